@@ -0,0 +1,272 @@
+"""
+Offline load test of the /chat endpoint.
+
+Starts two local stand-ins and the real FastAPI app, each in its own process:
+the DOREMUS MCP stand-in (fake_mcp_server.py, configurable latency and
+payload) and the backend with a scripted streaming chat model
+(fake_chat_model.py) registered in `evaluation_models`. It then drives /chat
+at a fixed concurrency and reports time to first token, end-to-end latency
+percentiles, throughput, and the backend's CPU time and RSS. No network
+access or API key is needed, so the numbers can be tracked in regression
+checks (--json writes them to a file).
+
+Usage:
+    python benchmarks/bench_chat_load.py --requests 200 --concurrency 16 --mcp-latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BENCH_DIR, "..", "src")
+SCRIPTED_MODEL = "scripted-benchmark"
+QUESTION = "Which works did Mozart compose?"
+
+
+def _serve_backend(args) -> None:
+    """Backend process: register the scripted model, then run the app with uvicorn."""
+    sys.path.insert(0, SRC)
+    import uvicorn
+
+    from agent import mcp_testing_agent
+    from fake_chat_model import DEFAULT_SCRIPT, ScriptedChatModel
+
+    answer = ("Mozart composed symphonies, concertos, operas and chamber music. " * args.answer_chars)[: args.answer_chars]
+    script = DEFAULT_SCRIPT[:-1] + [{"answer": answer}]
+    mcp_testing_agent.evaluation_models[SCRIPTED_MODEL] = "scripted"
+    mcp_testing_agent.model_factories["scripted"] = lambda name: ScriptedChatModel(
+        script=script,
+        first_token_delay=args.first_token_ms / 1000.0,
+        chunk_delay=args.chunk_ms / 1000.0,
+    )
+
+    import server  # after registering the model, so admission control knows its provider
+
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+class _ProcessSampler:
+    """CPU time and peak RSS of a process, read from /proc (Linux only)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def cpu_seconds(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss(self) -> Optional[int]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    async def _sample(self, interval: float) -> None:
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss() or 0)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = 0.05) -> None:
+        self._task = asyncio.create_task(self._sample(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def _one(client: httpx.AsyncClient, message: str) -> dict:
+    t0 = time.perf_counter()
+    ttft = None
+    outcome = "ok"
+    async with client.stream("POST", "/chat", json={"message": message, "model": SCRIPTED_MODEL}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"outcome": "rejected" if response.status_code == 429 else "failed", "ttft": None, "latency": None}
+        buffer = ""
+        async for text in response.aiter_text():
+            buffer += text
+            *frames, buffer = buffer.split("\n\n")
+            for frame in frames:
+                # Frames may start with an SSE `id:` line
+                data = next((line[6:] for line in frame.split("\n") if line.startswith("data: ")), None)
+                if data is None:
+                    continue
+                event = json.loads(data)
+                if event.get("type") == "message" and ttft is None:
+                    ttft = time.perf_counter() - t0
+                elif event.get("type") == "error":
+                    outcome = "failed"
+    return {"outcome": outcome, "ttft": ttft, "latency": time.perf_counter() - t0}
+
+
+def _percentile(samples: list[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    # Nearest-rank percentile
+    samples = sorted(samples)
+    return samples[max(0, math.ceil(q / 100 * len(samples)) - 1)]
+
+
+def _ms(value: Optional[float]) -> str:
+    return "     n/a" if value is None else f"{value * 1000:8.1f}"
+
+
+async def _drive(args, backend_pid: int) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # Warm-up: builds the agent and opens the MCP sessions
+        await _one(client, f"{QUESTION} (warm-up)")
+
+        sampler = _ProcessSampler(backend_pid)
+        cpu0 = sampler.cpu_seconds()
+        rss0 = sampler.rss()
+        sampler.start()
+
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i: int) -> dict:
+            async with sem:
+                # A distinct question per request, so the answer cache does not serve them
+                return await _one(client, QUESTION if args.same_question else f"{QUESTION} #{i}")
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+        wall = time.perf_counter() - t0
+
+        await sampler.stop()
+        cpu1 = sampler.cpu_seconds()
+
+    ok = [r for r in results if r["outcome"] == "ok"]
+    ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+    latencies = [r["latency"] for r in ok]
+    cpu = None if cpu0 is None or cpu1 is None else cpu1 - cpu0
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "ok": len(ok),
+        "failed": sum(r["outcome"] == "failed" for r in results),
+        "rejected": sum(r["outcome"] == "rejected" for r in results),
+        "wall_s": wall,
+        "throughput_rps": len(ok) / wall if wall > 0 else 0.0,
+        "ttft_s": {f"p{q}": _percentile(ttfts, q) for q in (50, 95, 99)},
+        "latency_s": {f"p{q}": _percentile(latencies, q) for q in (50, 95, 99)},
+        "server_cpu_s": cpu,
+        "server_cpu_ms_per_request": None if cpu is None or not args.requests else cpu / args.requests * 1000,
+        "server_rss_start_bytes": rss0,
+        "server_rss_peak_bytes": sampler.peak_rss or None,
+    }
+
+
+def _print_report(report: dict) -> None:
+    mb = lambda b: "n/a" if b is None else f"{b / 1024 / 1024:.1f}MB"  # noqa: E731
+    print(
+        f"requests={report['requests']} concurrency={report['concurrency']} ok={report['ok']} "
+        f"failed={report['failed']} rejected={report['rejected']}"
+    )
+    for label, key in (("ttft", "ttft_s"), ("latency", "latency_s")):
+        values = report[key]
+        print(f"{label:<9} p50={_ms(values['p50'])}ms p95={_ms(values['p95'])}ms p99={_ms(values['p99'])}ms")
+    print(f"throughput {report['throughput_rps']:.1f} req/s over {report['wall_s']:.2f}s")
+    cpu = report["server_cpu_s"]
+    cpu_text = "n/a" if cpu is None else f"{cpu:.2f}s ({report['server_cpu_ms_per_request']:.1f}ms/request)"
+    print(
+        f"server    cpu={cpu_text} "
+        f"rss start={mb(report['server_rss_start_bytes'])} peak={mb(report['server_rss_peak_bytes'])}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8790, help="Backend port")
+    parser.add_argument("--mcp-port", type=int, default=8791, help="MCP stand-in port")
+    parser.add_argument("--mcp-latency-ms", type=float, default=20.0, help="Server-side delay per MCP tool call")
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="Payload size of read tools")
+    parser.add_argument("--rows", type=int, default=50, help="Rows returned by execute_query")
+    parser.add_argument("--first-token-ms", type=float, default=100.0, help="Model delay before each turn's output")
+    parser.add_argument("--chunk-ms", type=float, default=2.0, help="Model delay between streamed chunks")
+    parser.add_argument("--answer-chars", type=int, default=1000, help="Length of the streamed final answer")
+    parser.add_argument("--same-question", action="store_true", help="Send one question (exercises the answer cache)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the backend's output")
+    parser.add_argument("--serve-backend", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_backend:
+        _serve_backend(args)
+        return
+
+    output = None if args.verbose else subprocess.DEVNULL
+    env = {
+        **os.environ,
+        "DOREMUS_MCP_URL": f"http://127.0.0.1:{args.mcp_port}/mcp",
+        "TOOL_SNAPSHOT_PATH": "",
+        "LANGSMITH_TRACING": "false",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+        "PROVIDER_CONCURRENCY_SCRIPTED": os.environ.get("PROVIDER_CONCURRENCY_SCRIPTED", str(args.concurrency)),
+        "ADMISSION_QUEUE_SIZE": os.environ.get("ADMISSION_QUEUE_SIZE", str(args.requests)),
+    }
+    mcp = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_mcp_server.py"), "--port", str(args.mcp_port),
+         "--latency-ms", str(args.mcp_latency_ms), "--payload-bytes", str(args.payload_bytes), "--rows", str(args.rows)],
+        stdout=output, stderr=output,
+    )
+    backend = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve-backend", *sys.argv[1:]],
+        cwd=SRC, env=env, stdout=output, stderr=output,
+    )
+    try:
+        _wait_for_port(args.mcp_port)
+        _wait_for_port(args.port, timeout=60.0)
+        report = asyncio.run(_drive(args, backend.pid))
+    finally:
+        for proc in (backend, mcp):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
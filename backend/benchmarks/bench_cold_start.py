@@ -0,0 +1,109 @@
+"""
+Cold-start cost of the backend: module import time and first-request agent latency.
+
+Import time is measured in fresh interpreters for the agent module as it is
+now (provider packages imported lazily) and with every provider package
+imported up front, as the module used to do.
+
+First-request latency is the time until each model's agent is ready when
+requests for several models arrive at once, against the local DOREMUS
+stand-in. "global-lock" reproduces the previous behaviour (one lock for all
+models, tool list fetched per model); "per-model" is the current `get_agent`
+(per-model locks, shared tool catalog).
+
+Usage:
+    python benchmarks/bench_cold_start.py --runs 5 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+EAGER_PROVIDERS = "import langchain_openai, langchain_groq, langchain_anthropic, langchain_ollama; "
+IMPORT_SNIPPET = (
+    "import time; t0 = time.perf_counter(); {prefix}import agent.mcp_testing_agent; "
+    "print(time.perf_counter() - t0)"
+)
+
+
+def _import_time(prefix: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(prefix=prefix)],
+            cwd=SRC,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+async def _first_request(models: list[str]) -> tuple[dict[str, float], dict[str, float]]:
+    import server
+    from agent import mcp_testing_agent
+
+    async def timed(fn, model):
+        t0 = time.perf_counter()
+        await fn(model)
+        return model, time.perf_counter() - t0
+
+    # Import provider packages up front so both variants pay the same model construction cost
+    for model in models:
+        mcp_testing_agent.create_model(model)
+
+    # Previous behaviour: one global lock, tool list fetched again for every model
+    global_lock = asyncio.Lock()
+
+    async def old_get_agent(model):
+        async with global_lock:
+            mcp_testing_agent._tool_catalog = None
+            await mcp_testing_agent.initialize_agent(model)
+
+    before = dict(await asyncio.gather(*(timed(old_get_agent, m) for m in models)))
+
+    server._AGENT_CACHE.clear()
+    mcp_testing_agent._tool_catalog = None
+    after = dict(await asyncio.gather(*(timed(server.get_agent, m) for m in models)))
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Interpreter launches per import measurement")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Server-side delay per MCP request")
+    parser.add_argument("--models", default="gpt-4.1,qwen3-coder:30b,ministral-3:14b")
+    args = parser.parse_args()
+
+    eager = _import_time(EAGER_PROVIDERS, args.runs)
+    lazy = _import_time("", args.runs)
+    print(f"import agent.mcp_testing_agent  eager providers: {eager * 1000:8.1f}ms  lazy: {lazy * 1000:8.1f}ms")
+
+    from fake_mcp_server import serve_in_thread
+
+    os.environ["DOREMUS_MCP_URL"] = f"http://127.0.0.1:{args.port}/mcp"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("LANGSMITH_TRACING", "false")
+    os.environ["TOOL_SNAPSHOT_PATH"] = ""  # measure the live tool-list fetch, not the snapshot
+    server = serve_in_thread(args.port, latency_ms=args.latency_ms)
+    try:
+        models = [m.strip() for m in args.models.split(",") if m.strip()]
+        before, after = asyncio.run(_first_request(models))
+    finally:
+        server.should_exit = True
+
+    print("first-request agent latency (all models requested at once):")
+    for model in models:
+        print(f"  {model:<20} global-lock: {before[model] * 1000:8.1f}ms  per-model: {after[model] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Chat event source benchmark: astream_events v1 vs. the "messages" stream.
+
+Runs the real agent graph (create_react_agent) with a scripted chat model and
+in-process DOREMUS-named tools through both event sources used by /chat, and
+reports the raw LangChain events/callbacks each source handles, the chat
+events it forwards, and CPU time per request. Both sources are checked to
+forward the same events.
+
+Usage:
+    python benchmarks/bench_event_source.py --requests 50 --answer-chars 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+
+from langchain_core.tools import tool  # noqa: E402
+from langgraph.prebuilt import create_react_agent  # noqa: E402
+
+import server  # noqa: E402
+from fake_chat_model import DEFAULT_SCRIPT, ScriptedChatModel  # noqa: E402
+
+
+@tool
+async def find_candidate_entities(name: str, entity_type: str = "") -> str:
+    """Find candidate URIs for a named entity."""
+    return json.dumps({"matches_found": 3, "matches": [{"uri": f"http://data.doremus.org/artist/{i}"} for i in range(3)]})
+
+
+@tool
+async def get_entity_properties(uri: str) -> str:
+    """Return every property of an entity."""
+    return json.dumps({"uri": uri, "properties": {"rdfs:label": "Mozart"}})
+
+
+@tool
+async def build_query(question: str = "") -> str:
+    """Start a new query builder."""
+    return json.dumps({"success": True, "query_id": "q1", "generated_query": "SELECT ?s WHERE { ?s ?p ?o }"})
+
+
+@tool
+async def execute_query(query_id: str = "") -> str:
+    """Execute a SPARQL query."""
+    return json.dumps({"success": True, "rows": [{"title": f"Work {i}"} for i in range(10)]})
+
+
+def _normalized(events: list[dict]) -> list[dict]:
+    # Tool ids are fresh run ids on every run: compare them by order of appearance
+    ids: dict = {}
+    out = []
+    for event in events:
+        event = json.loads(json.dumps(event, default=str))
+        if isinstance(event["data"], dict) and "id" in event["data"]:
+            event["data"]["id"] = ids.setdefault(event["data"]["id"], len(ids))
+        out.append(event)
+    return out
+
+
+async def _measure(label: str, source, agent, requests: int) -> list[dict]:
+    server.EVENT_SOURCE_STATS["processed"] = 0
+    forwarded = 0
+    events: list[dict] = []
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        events = [event async for event in source(agent, "Which works did Mozart compose?")]
+        forwarded += len(events)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    print(
+        f"{label:<15} processed/request={server.EVENT_SOURCE_STATS['processed'] / requests:8.1f} "
+        f"forwarded/request={forwarded / requests:7.1f} "
+        f"cpu/request={cpu / requests * 1000:7.2f}ms wall/request={wall / requests * 1000:7.2f}ms"
+    )
+    return events
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--answer-chars", type=int, default=2000, help="Length of the streamed final answer")
+    parser.add_argument("--chars-per-chunk", type=int, default=4)
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT[:-1] + [{"answer": ("Mozart composed many works. " * args.answer_chars)[: args.answer_chars]}]
+    model = ScriptedChatModel(script=script, chars_per_chunk=args.chars_per_chunk)
+    tools = [find_candidate_entities, get_entity_properties, build_query, execute_query]
+    agent = create_react_agent(model, tools=tools).with_config({"recursion_limit": 50})
+
+    # Warm up both paths (imports, graph compilation caches)
+    await _measure("warmup", server._agent_events, agent, 1)
+    await _measure("warmup", server._streamed_agent_events, agent, 1)
+    print()
+
+    old = await _measure("astream_events", server._agent_events, agent, args.requests)
+    new = await _measure("messages", server._streamed_agent_events, agent, args.requests)
+    print("same forwarded events:", _normalized(old) == _normalized(new))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
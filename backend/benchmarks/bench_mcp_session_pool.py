@@ -0,0 +1,76 @@
+"""
+Per-tool-call latency of ExtendedMCPClient tools, with and without the session pool.
+
+Starts the local DOREMUS stand-in server and calls `find_candidate_entities`
+repeatedly through tools built with `pool_size=0` (one MCP session per call,
+the previous behaviour) and with the pooled client.
+
+Usage:
+    python benchmarks/bench_mcp_session_pool.py --calls 200 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from agent.extended_mcp_client import ExtendedMCPClient  # noqa: E402
+from fake_mcp_server import serve_in_thread  # noqa: E402
+
+
+def _report(label: str, samples: list[float], wall: float) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    print(
+        f"{label:<10} calls={len(samples):<5} mean={statistics.mean(samples) * 1000:7.2f}ms "
+        f"p50={statistics.median(samples) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms "
+        f"throughput={len(samples) / wall:7.1f} calls/s"
+    )
+
+
+async def _run(client: ExtendedMCPClient, calls: int, concurrency: int) -> tuple[list[float], float]:
+    tools = {t.name: t for t in await client.get_tools()}
+    tool = tools["find_candidate_entities"]
+    await tool.ainvoke({"name": "Mozart"})  # warm-up
+
+    samples: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            t0 = time.perf_counter()
+            await tool.ainvoke({"name": f"Composer {i}"})
+            samples.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    wall = time.perf_counter() - t0
+    await client.aclose()
+    return samples, wall
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Server-side delay per tool call")
+    args = parser.parse_args()
+
+    server = serve_in_thread(args.port, latency_ms=args.latency_ms)
+    connections = {"DOREMUS_MCP": {"transport": "streamable_http", "url": f"http://127.0.0.1:{args.port}/mcp"}}
+
+    try:
+        for label, pool_size in (("per-call", 0), ("pooled", args.concurrency)):
+            client = ExtendedMCPClient(connections=connections, pool_size=pool_size)
+            samples, wall = await _run(client, args.calls, args.concurrency)
+            _report(label, samples, wall)
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+SSE framing micro-benchmark: per-token frames vs. coalesced frames.
+
+Feeds a synthetic answer stream (token chunks with a few tool events in
+between) through the framing layer used by /chat and reports frames written,
+frames/sec, and CPU time per 1k tokens. Each frame is written to /dev/null
+with its own write() call, as it would be on a real connection. The "source"
+row consumes the same stream without framing, as the baseline cost of
+producing it.
+
+Usage:
+    python benchmarks/bench_sse_framing.py --tokens 20000 --interval-us 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import sse  # noqa: E402
+
+
+async def _events(tokens: int, interval: float, tool_every: int):
+    for i in range(tokens):
+        if tool_every and i and i % tool_every == 0:
+            yield {"type": "tool_start", "data": {"id": str(i), "name": "execute_query", "args": {"query_id": "q1"}}}
+            yield {"type": "tool_end", "data": {"id": str(i), "name": "execute_query", "output": "Success"}}
+        yield {"type": "message", "data": " tok"}
+        if interval > 0:
+            await asyncio.sleep(interval)
+        elif i % 64 == 0:
+            await asyncio.sleep(0)
+
+
+async def _source_only(events):
+    async for _ in events:
+        yield ""
+
+
+async def _measure(label: str, frames_fn, args) -> None:
+    frames = written = 0
+    fd = os.open(os.devnull, os.O_WRONLY)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    try:
+        async for frame in frames_fn(_events(args.tokens, args.interval_us / 1e6, args.tool_every)):
+            if frame:
+                written += os.write(fd, frame.encode("utf-8"))
+                frames += 1
+    finally:
+        os.close(fd)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    print(
+        f"{label:<10} frames={frames:<7} bytes={written:<9} "
+        f"frames/s={frames / wall:10.0f} cpu/1k tokens={cpu / args.tokens * 1000 * 1000:7.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--interval-us", type=float, default=0.0, help="Delay between token chunks")
+    parser.add_argument("--tool-every", type=int, default=500, help="Insert a tool call every N tokens (0 = never)")
+    parser.add_argument("--window-ms", type=float, default=25.0)
+    parser.add_argument("--max-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if sse.orjson is not None else 'json'}")
+    await _measure("source", _source_only, args)
+    await _measure("token", sse.token_frames, args)
+    await _measure(
+        "coalesce",
+        lambda events: sse.coalesced_frames(events, window=args.window_ms / 1000.0, max_bytes=args.max_bytes),
+        args,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
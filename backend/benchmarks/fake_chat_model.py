@@ -0,0 +1,96 @@
+"""
+Scripted stand-in for a tool-calling chat model.
+
+Replays a fixed sequence of turns: each turn either calls tools or streams the
+final answer in small chunks, so the agent graph, the event pipeline and the
+SSE layer can be exercised without an LLM provider.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DEFAULT_SCRIPT = [
+    {"tool_calls": [{"name": "find_candidate_entities", "args": {"name": "Mozart", "entity_type": "artist"}}]},
+    {"tool_calls": [{"name": "get_entity_properties", "args": {"uri": "http://data.doremus.org/artist/0-Mozart"}}]},
+    {"tool_calls": [{"name": "build_query", "args": {"question": "Works composed by Mozart"}}]},
+    {"tool_calls": [{"name": "execute_query", "args": {"query_id": "q1"}}]},
+    {"answer": "Mozart composed many works, among them symphonies, concertos, operas and chamber music. " * 8},
+]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that follows `script`, one entry per LLM turn of the current question."""
+
+    script: list[dict] = DEFAULT_SCRIPT
+    chars_per_chunk: int = 4
+    chunk_delay: float = 0.0  # seconds between streamed chunks
+    first_token_delay: float = 0.0  # seconds before the first chunk of every turn
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _step(self, messages: list[BaseMessage]) -> tuple[int, dict]:
+        # The turn number is the count of tool-calling answers since the last user message
+        turn = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage) and message.tool_calls:
+                turn += 1
+        return turn, self.script[min(turn, len(self.script) - 1)]
+
+    def _chunks(self, messages: list[BaseMessage]) -> Iterator[AIMessageChunk]:
+        turn, step = self._step(messages)
+        if "tool_calls" in step:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": f"call_{turn}_{i}", "index": i}
+                    for i, call in enumerate(step["tool_calls"])
+                ],
+            )
+            return
+        text = step.get("answer", "")
+        for i in range(0, len(text), self.chars_per_chunk):
+            yield AIMessageChunk(content=text[i : i + self.chars_per_chunk])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = None
+        for chunk in self._chunks(messages):
+            message = chunk if message is None else message + chunk
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=message.content, tool_calls=message.tool_calls))]
+        )
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.first_token_delay > 0:
+            await asyncio.sleep(self.first_token_delay)
+        for i, message in enumerate(self._chunks(messages)):
+            if i and self.chunk_delay > 0:
+                await asyncio.sleep(self.chunk_delay)
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                await run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
+
@@ -0,0 +1,135 @@
+"""
+Local stand-in for the DOREMUS MCP server.
+
+Exposes the same tool names as the real server with canned answers, a
+configurable per-call latency and a configurable payload size, so the backend
+can be benchmarked without network access.
+
+Usage:
+    python benchmarks/fake_mcp_server.py --port 8765 --latency-ms 20 --payload-bytes 2000
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+
+DOREMUS_TOOLS = [
+    "get_ontology",
+    "find_candidate_entities",
+    "get_entity_properties",
+    "build_query",
+    "add_triplet",
+    "select_aggregate_variable",
+    "associate_to_N_entities",
+    "execute_query",
+]
+
+
+def build_server(latency_ms: float = 0.0, payload_bytes: int = 256, rows: int = 10) -> FastMCP:
+    """
+    Build a FastMCP app exposing the DOREMUS tool names.
+
+    Args:
+        latency_ms: Artificial delay added to every tool call
+        payload_bytes: Approximate size of the text payload returned by read tools
+        rows: Number of result rows returned by execute_query
+
+    Returns:
+        The configured FastMCP server.
+    """
+    mcp = FastMCP("DOREMUS-stand-in", log_level="WARNING")
+    filler = "x" * max(0, payload_bytes)
+
+    async def _delay():
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000.0)
+
+    @mcp.tool()
+    async def get_ontology(depth: int = 1) -> str:
+        """Return the DOREMUS ontology schema."""
+        await _delay()
+        return json.dumps({"classes": ["efrbroo:F22_Self-Contained_Expression", "ecrm:E21_Person"], "notes": filler})
+
+    @mcp.tool()
+    async def find_candidate_entities(name: str, entity_type: str = "") -> str:
+        """Find candidate URIs for a named entity."""
+        await _delay()
+        matches = [
+            {"uri": f"http://data.doremus.org/artist/{i}-{name.replace(' ', '_')}", "label": name, "type": entity_type}
+            for i in range(3)
+        ]
+        return json.dumps({"matches_found": len(matches), "matches": matches})
+
+    @mcp.tool()
+    async def get_entity_properties(uri: str) -> str:
+        """Return every property of an entity."""
+        await _delay()
+        return json.dumps({"uri": uri, "properties": {"rdfs:label": uri.rsplit("/", 1)[-1], "notes": filler}})
+
+    @mcp.tool()
+    async def build_query(question: str = "") -> str:
+        """Start a new query builder."""
+        await _delay()
+        return json.dumps({"success": True, "query_id": "q1", "generated_query": "SELECT ?s WHERE { ?s ?p ?o }"})
+
+    @mcp.tool()
+    async def add_triplet(query_id: str, subject: str, predicate: str, obj: str) -> str:
+        """Add a triple pattern to a query builder."""
+        await _delay()
+        return json.dumps({"success": True, "generated_query": f"SELECT ?s WHERE {{ {subject} {predicate} {obj} }}"})
+
+    @mcp.tool()
+    async def select_aggregate_variable(query_id: str, variable: str, function: str = "COUNT") -> str:
+        """Select an aggregate on a query builder."""
+        await _delay()
+        return json.dumps({"success": True})
+
+    @mcp.tool()
+    async def associate_to_N_entities(query_id: str, variable: str, uris: list[str]) -> str:
+        """Constrain a variable to a list of entities."""
+        await _delay()
+        return json.dumps({"success": True})
+
+    @mcp.tool()
+    async def execute_query(query_id: str = "", sparql: str = "") -> str:
+        """Execute a SPARQL query."""
+        await _delay()
+        result_rows = [{"work": f"http://data.doremus.org/expression/{i}", "title": f"Work {i}"} for i in range(rows)]
+        return json.dumps({"success": True, "columns": ["work", "title"], "rows": result_rows, "notes": filler})
+
+    return mcp
+
+
+def serve_in_thread(port: int, **kwargs) -> uvicorn.Server:
+    """
+    Start the stand-in server on 127.0.0.1:`port` in a daemon thread.
+
+    Returns:
+        The running uvicorn server (set `should_exit = True` to stop it).
+    """
+    app = build_server(**kwargs).streamable_http_app()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--rows", type=int, default=10)
+    args = parser.parse_args()
+
+    app = build_server(args.latency_ms, args.payload_bytes, args.rows).streamable_http_app()
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+
+class QueueFull(Exception):
+    """Raised when a provider's wait queue is full; carries a Retry-After hint in seconds."""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(f"Too many concurrent requests for provider '{provider}'")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class _ProviderQueue:
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self.waiters: deque["Ticket"] = deque()
+        self.changed = asyncio.Event()
+        self.avg_hold = 0.0  # EWMA of how long a slot is held, for Retry-After
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def grant_waiting(self) -> None:
+        while self.waiters and self.active < self.limit:
+            ticket = self.waiters.popleft()
+            ticket.granted_at = time.monotonic()
+            self.active += 1
+        self.notify()
+
+
+class Ticket:
+    """A request's place in a provider queue: either holding a slot or waiting for one."""
+
+    def __init__(self, limiter: "AdmissionController", provider: str, queue: _ProviderQueue):
+        self._limiter = limiter
+        self.provider = provider
+        self._queue = queue
+        self.granted_at: Optional[float] = None
+        self._released = False
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    def position(self) -> int:
+        try:
+            return self._queue.waiters.index(self) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self) -> AsyncIterator[dict]:
+        """
+        Wait for a slot, yielding a `queue` event whenever the queue position changes.
+
+        Ends with an `error` event if no slot frees up within the max queue time.
+        """
+        deadline = time.monotonic() + self._limiter.max_queue_time
+        last_position = None
+        while not self.granted:
+            position = self.position()
+            if position != last_position:
+                last_position = position
+                yield {"type": "queue", "data": {"position": position, "provider": self.provider}}
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._limiter.stats["queue_timeouts"] += 1
+                self.release()
+                yield {"type": "error", "data": "Server busy, please retry"}
+                return
+            changed = self._queue.changed
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self) -> None:
+        """Give the slot back (or leave the queue); safe to call more than once."""
+        if self._released:
+            return
+        self._released = True
+        queue = self._queue
+        if self.granted:
+            held = time.monotonic() - self.granted_at
+            queue.avg_hold = held if queue.avg_hold == 0 else 0.8 * queue.avg_hold + 0.2 * held
+            queue.active -= 1
+            queue.grant_waiting()
+        else:
+            try:
+                queue.waiters.remove(self)
+            except ValueError:
+                pass
+            queue.notify()
+
+
+class AdmissionController:
+    """
+    Per-provider concurrency limits with a bounded FIFO wait queue.
+
+    `admit` never blocks: it either hands out a slot, queues the request, or
+    raises `QueueFull` so the endpoint can answer 429 right away.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int],
+        *,
+        default_limit: int = 4,
+        max_queue: int = 16,
+        max_queue_time: float = 30.0,
+    ):
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self._queues: dict[str, _ProviderQueue] = {}
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "queue_timeouts": 0}
+
+    def _queue(self, provider: str) -> _ProviderQueue:
+        queue = self._queues.get(provider)
+        if queue is None:
+            queue = _ProviderQueue(self.limits.get(provider, self.default_limit), self.max_queue)
+            self._queues[provider] = queue
+        return queue
+
+    def admit(self, provider: str) -> Ticket:
+        """
+        Take a slot for `provider`, or a place in its wait queue.
+
+        Raises:
+            QueueFull: If the provider is saturated and its queue is full.
+        """
+        queue = self._queue(provider)
+        ticket = Ticket(self, provider, queue)
+        if queue.active < queue.limit and not queue.waiters:
+            queue.active += 1
+            ticket.granted_at = time.monotonic()
+            self.stats["admitted"] += 1
+            return ticket
+        if len(queue.waiters) >= queue.max_queue:
+            self.stats["rejected"] += 1
+            raise QueueFull(provider, self._retry_after(queue))
+        queue.waiters.append(ticket)
+        self.stats["queued"] += 1
+        return ticket
+
+    def try_admit(self, provider: str) -> Optional[Ticket]:
+        """Take a slot for `provider` only if one is free right now (never queues)."""
+        queue = self._queue(provider)
+        if queue.active >= queue.limit or queue.waiters:
+            return None
+        return self.admit(provider)
+
+    def _retry_after(self, queue: _ProviderQueue) -> int:
+        if queue.avg_hold <= 0:
+            return 5
+        return min(60, max(1, math.ceil(queue.avg_hold * (len(queue.waiters) + 1) / queue.limit)))
+
+    def snapshot(self) -> dict:
+        return {
+            provider: {"active": q.active, "limit": q.limit, "waiting": len(q.waiters)}
+            for provider, q in self._queues.items()
+        }
@@ -0,0 +1,175 @@
+import json
+import re
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+
+# Identifiers that let the LLM refer back to a tool result: entity URIs and builder/result handles
+_URI_RE = re.compile(r"https?://[^\s\"'<>\\]+")
+_HANDLE_RE = re.compile(r"\"(query_id|result_id)\"\s*:\s*\"([^\"]+)\"")
+
+COMPACTED_PREFIX = "[compacted]"
+
+# Per-run counters, set by whoever drives the run (see `track_run`)
+_RUN_STATS: ContextVar[Optional[dict]] = ContextVar("context_compaction_run_stats", default=None)
+
+
+def track_run() -> dict:
+    """
+    Start counting compaction for the run driven by the current task.
+
+    The returned dict is updated by every LLM call of the run (including
+    calls made in tasks started from this one): `llm_calls`, `compacted`
+    (tool messages replaced by a digest or truncated), and estimated
+    `tokens_before`/`tokens_after`/`tokens_saved` summed over the calls.
+    """
+    stats = {"llm_calls": 0, "compacted": 0, "tokens_before": 0, "tokens_after": 0, "tokens_saved": 0}
+    _RUN_STATS.set(stats)
+    return stats
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    try:
+        return json.dumps(content, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return str(content)
+
+
+def _identifiers(text: str) -> list[str]:
+    found = [m.group(2) for m in _HANDLE_RE.finditer(text)]
+    for uri in _URI_RE.findall(text):
+        if uri not in found:
+            found.append(uri)
+    return found
+
+
+class ContextCompactor:
+    """
+    Prompt hook for the ReAct agent that keeps old tool outputs out of the prompt.
+
+    Every ToolMessage is re-sent on each LLM call of a run, so the prompt
+    grows with every step. Before each call, the outputs of tool rounds older
+    than the last `keep_recent` are replaced by a short digest (tool name,
+    size, the first `digest_chars` characters and the URIs/handles they
+    contain), unless a recent tool call still refers to one of their
+    identifiers. If the prompt still exceeds `max_tokens` (estimated at
+    `chars_per_token`), older outputs are digested regardless and the latest
+    ones truncated. The graph state is left untouched: only what is sent to
+    the LLM changes.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        *,
+        keep_recent: int = 2,
+        max_tokens: int = 24000,
+        digest_chars: int = 300,
+        chars_per_token: float = 4.0,
+    ):
+        self.system_message = SystemMessage(content=system_prompt)
+        self.keep_recent = max(1, keep_recent)
+        self.max_tokens = max_tokens
+        self.digest_chars = digest_chars
+        self.chars_per_token = chars_per_token
+        self.stats = {"llm_calls": 0, "compacted_calls": 0, "compacted": 0, "tokens_saved": 0}
+
+    def _tokens(self, messages: list[BaseMessage]) -> int:
+        chars = 0
+        for message in messages:
+            chars += len(_text(message.content))
+            for call in getattr(message, "tool_calls", None) or ():
+                chars += len(call.get("name") or "") + len(_text(call.get("args")))
+        return int(chars / self.chars_per_token)
+
+    def _digest(self, message: ToolMessage, text: str) -> ToolMessage:
+        head = " ".join(text[: self.digest_chars].split())
+        ids = _identifiers(text)[:8]
+        digest = f"{COMPACTED_PREFIX} {message.name or 'tool'} output, {len(text)} chars. Starts with: {head}"
+        if len(text) > self.digest_chars:
+            digest += " ..."
+        if ids:
+            digest += " | identifiers: " + ", ".join(ids)
+        digest += " | call the tool again if the full output is needed."
+        return message.model_copy(update={"content": digest})
+
+    def _truncate(self, message: ToolMessage, text: str, max_chars: int) -> ToolMessage:
+        kept = text[: max(self.digest_chars, max_chars)]
+        return message.model_copy(
+            update={"content": f"{kept} ... {COMPACTED_PREFIX} truncated from {len(text)} chars"}
+        )
+
+    def compact(self, messages: list[BaseMessage]) -> tuple[list[BaseMessage], int]:
+        """Return the messages to send and how many tool outputs were shortened."""
+        # Tool rounds: the ToolMessages answering one AIMessage's tool calls
+        rounds: list[int] = []  # round index of each message (-1 outside a round)
+        ai_turns: list[int] = []
+        current = -1
+        for i, message in enumerate(messages):
+            if isinstance(message, AIMessage) and message.tool_calls:
+                current += 1
+                ai_turns.append(i)
+            rounds.append(current if isinstance(message, ToolMessage) else -1)
+        recent_from = current - self.keep_recent + 1
+        recent_calls = " ".join(
+            _text(call.get("args")) for i in ai_turns[max(0, recent_from):] for call in messages[i].tool_calls
+        )
+
+        out = list(messages)
+        texts = {i: _text(m.content) for i, m in enumerate(messages) if isinstance(m, ToolMessage)}
+        compacted: set[int] = set()
+
+        def digest(i: int) -> None:
+            digested = self._digest(out[i], texts[i])
+            if len(_text(digested.content)) < len(texts[i]):
+                out[i] = digested
+                compacted.add(i)
+
+        # Old rounds, unless a recent call still refers to them
+        for i, text in texts.items():
+            if rounds[i] < recent_from and not text.startswith(COMPACTED_PREFIX):
+                if not any(ident in recent_calls for ident in _identifiers(text)):
+                    digest(i)
+
+        # Over budget: digest the rest of the older outputs, oldest first, then cut the latest ones
+        budget = self.max_tokens - self._tokens([self.system_message])
+        if self._tokens(out) > budget:
+            for i in sorted(texts):
+                if rounds[i] < current and i not in compacted:
+                    digest(i)
+                    if self._tokens(out) <= budget:
+                        break
+        latest = [i for i in texts if rounds[i] == current and i not in compacted]
+        excess = self._tokens(out) - budget
+        if excess > 0 and latest:
+            # Room left for the latest outputs, less the truncation notes
+            chars = sum(len(texts[i]) for i in latest) - excess * self.chars_per_token - 64 * len(latest)
+            for i in latest:
+                share = int(chars * len(texts[i]) / sum(len(texts[j]) for j in latest))
+                if share < len(texts[i]):
+                    out[i] = self._truncate(out[i], texts[i], share)
+                    compacted.add(i)
+        return out, len(compacted)
+
+    def __call__(self, state: dict) -> list[BaseMessage]:
+        messages = list(state["messages"])
+        compacted_messages, compacted = self.compact(messages)
+        before = self._tokens(messages)
+        after = self._tokens(compacted_messages) if compacted else before
+
+        self.stats["llm_calls"] += 1
+        if compacted:
+            self.stats["compacted_calls"] += 1
+            self.stats["compacted"] += compacted
+            self.stats["tokens_saved"] += before - after
+        run = _RUN_STATS.get()
+        if run is not None:
+            run["llm_calls"] += 1
+            run["compacted"] += compacted
+            run["tokens_before"] += before
+            run["tokens_after"] += after
+            run["tokens_saved"] += before - after
+        return [self.system_message] + compacted_messages
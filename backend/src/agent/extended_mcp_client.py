@@ -1,28 +1,68 @@
 from langsmith.client import Client
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_mcp_adapters.sessions import create_session
-from langchain_mcp_adapters.tools import load_mcp_tools
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool, load_mcp_tools
+from langchain_mcp_adapters.resources import load_mcp_resources
+from langchain_mcp_adapters.prompts import load_mcp_prompt
 from langchain_core.tools import BaseTool
 from langchain_core.documents.base import Blob
 from langchain_core.messages import AIMessage, HumanMessage
+from mcp.types import Tool as MCPTool
 from typing import Any, AsyncIterator, Optional
 from contextlib import asynccontextmanager
 
+from .session_pool import MCPSessionPool, PooledSessionProxy
+
 class ExtendedMCPClient(Client):
     """
     Extended MCP Client that combines the functionality of LangSmith's Client
     and MultiServerMCPClient.
+
+    Sessions are kept in a per-server pool of long-lived, initialized
+    connections; a `pool_size` of 0 restores the one-session-per-call behaviour.
     """
 
-    def __init__(self, connections: Optional[dict[str, Any]] = None):
+    def __init__(
+        self,
+        connections: Optional[dict[str, Any]] = None,
+        *,
+        pool_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+    ):
         super().__init__()
         self.connections = connections if connections else {}
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._pools: dict[str, MCPSessionPool] = {}
+
+    def _pool(self, server_name: str) -> Optional[MCPSessionPool]:
+        """Return the session pool for a server, creating it on first use (None if pooling is disabled)."""
+        if self.pool_size <= 0:
+            return None
+        pool = self._pools.get(server_name)
+        if pool is None:
+            pool = MCPSessionPool(
+                self.connections[server_name],
+                size=self.pool_size,
+                idle_timeout=self.idle_timeout,
+                health_check_interval=self.health_check_interval,
+            )
+            self._pools[server_name] = pool
+        return pool
+
+    def _tool_session(self, server_name: str) -> Optional[PooledSessionProxy]:
+        pool = self._pool(server_name)
+        return PooledSessionProxy(pool) if pool is not None else None
 
     @asynccontextmanager
-    async def session(self, server_name: str, *, auto_initialize: bool = True) -> AsyncIterator[Any]:
+    async def mcp_session(self, server_name: str, *, auto_initialize: bool = True) -> AsyncIterator[Any]:
         """
         Connect to an MCP server and initialize a session.
 
+        (Not named `session`: LangSmith's Client uses that attribute for its HTTP session.)
+
         Args:
             server_name: Name to identify this server connection
             auto_initialize: Whether to automatically initialize the session
@@ -33,6 +73,12 @@ class ExtendedMCPClient(Client):
         if server_name not in self.connections:
             raise ValueError(f"Server '{server_name}' not found in connections.")
 
+        pool = self._pool(server_name)
+        if pool is not None:
+            async with pool.acquire() as session:
+                yield session
+            return
+
         async with create_session(self.connections[server_name]) as session:
             if auto_initialize:
                 await session.initialize()
@@ -52,13 +98,54 @@ class ExtendedMCPClient(Client):
             if server_name not in self.connections:
                 raise ValueError(f"Server '{server_name}' not found in connections.")
 
-            return await load_mcp_tools(None, connection=self.connections[server_name])
+            return await load_mcp_tools(self._tool_session(server_name), connection=self.connections[server_name])
 
         tools = []
         for name, connection in self.connections.items():
-            tools.extend(await load_mcp_tools(None, connection=connection))
+            tools.extend(await load_mcp_tools(self._tool_session(name), connection=connection))
         return tools
 
+    async def list_mcp_tools(self, server_name: str) -> list[MCPTool]:
+        """
+        List the raw MCP tool definitions (name, description, input schema) of a server.
+
+        Args:
+            server_name: Name of the server to list tools from.
+
+        Returns:
+            A list of MCP tool definitions.
+        """
+        tools: list[MCPTool] = []
+        cursor = None
+        async with self.mcp_session(server_name) as session:
+            while True:
+                page = await session.list_tools(cursor=cursor)
+                tools.extend(page.tools)
+                cursor = page.nextCursor
+                if not cursor:
+                    return tools
+
+    def tools_from_definitions(self, server_name: str, mcp_tools: list[MCPTool]) -> list[BaseTool]:
+        """
+        Build LangChain tools from MCP tool definitions without contacting the server.
+
+        Args:
+            server_name: Name of the server the tools will be called on.
+            mcp_tools: MCP tool definitions, e.g. loaded from a snapshot.
+
+        Returns:
+            A list of tools.
+        """
+        if server_name not in self.connections:
+            raise ValueError(f"Server '{server_name}' not found in connections.")
+
+        return [
+            convert_mcp_tool_to_langchain_tool(
+                self._tool_session(server_name), tool, connection=self.connections[server_name]
+            )
+            for tool in mcp_tools
+        ]
+
     async def get_resources(self, server_name: str, *, uris: Optional[list[str]] = None) -> list[Blob]:
         """
         Get resources from a specific server.
@@ -70,8 +157,8 @@ class ExtendedMCPClient(Client):
         Returns:
             A list of resources.
         """
-        async with self.session(server_name) as session:
-            return await session.get_resources(uris=uris)
+        async with self.mcp_session(server_name) as session:
+            return await load_mcp_resources(session, uris=uris)
 
     async def get_prompt(self, server_name: str, prompt_name: str, *, arguments: Optional[dict[str, Any]] = None) -> list[HumanMessage | AIMessage]:
         """
@@ -85,5 +172,11 @@ class ExtendedMCPClient(Client):
         Returns:
             A list of messages representing the prompt.
         """
-        async with self.session(server_name) as session:
-            return await session.get_prompt(prompt_name, arguments=arguments)
\ No newline at end of file
+        async with self.mcp_session(server_name) as session:
+            return await load_mcp_prompt(session, prompt_name, arguments=arguments)
+
+    async def aclose(self) -> None:
+        """Close every pooled session."""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            await pool.aclose()
\ No newline at end of file
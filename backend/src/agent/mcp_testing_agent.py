@@ -2,19 +2,61 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-from langchain_anthropic import ChatAnthropic
-from langchain_ollama import ChatOllama
 
-from .prompts import agent_system_prompt
+from .prompts import agent_system_prompt, result_preview_note
+from .context_compaction import ContextCompactor
 from .extended_mcp_client import ExtendedMCPClient
+from .metrics import REGISTRY, counter_lines, instrument_tools
+from .prefetch import EntityPrefetcher
+from .result_store import ResultStore
+from .session_store import SessionStore
+from .tool_cache import ToolResultCache, parse_cacheable_tools
+from .tool_snapshot import catalog_fingerprint, load_snapshot, save_snapshot
 
 load_dotenv(".env")
 
+
+def env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
 recursion_limit = int(os.getenv("GRAPH_RECURSION_LIMIT", "25"))
 mcp_url = os.getenv("DOREMUS_MCP_URL", "https://Doremus.fastmcp.app/mcp")
 mcp_transport = os.getenv("DOREMUS_MCP_TRANSPORT", "streamable_http")
+mcp_pool_size = int(os.getenv("MCP_POOL_SIZE", "4"))
+mcp_pool_idle_timeout = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300"))
+mcp_pool_health_check_interval = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "30"))
+tool_cache_enabled = env_flag("TOOL_CACHE_ENABLED")
+tool_cache_tools = os.getenv("TOOL_CACHE_TOOLS", "")
+tool_cache_max_entries = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+tool_cache_max_bytes = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Local copy of the server's tool definitions ("" disables it); revalidated in the background
+tool_snapshot_path = os.getenv("TOOL_SNAPSHOT_PATH", os.path.join(os.path.dirname(__file__), "tool_snapshot.json"))
+tool_snapshot_refresh_interval = float(os.getenv("TOOL_SNAPSHOT_REFRESH_INTERVAL", "0"))
+# Speculative get_entity_properties calls for the top candidates of find_candidate_entities
+prefetch_enabled = env_flag("PREFETCH_ENABLED")
+prefetch_top_k = int(os.getenv("PREFETCH_TOP_K", "2"))
+prefetch_max_inflight = int(os.getenv("PREFETCH_MAX_INFLIGHT", "4"))
+prefetch_ttl = float(os.getenv("PREFETCH_TTL", "300"))
+# Large tabular results of these tools stay on the server; the LLM gets a preview
+result_offload_enabled = env_flag("RESULT_OFFLOAD_ENABLED", "true")
+result_offload_tools = os.getenv("RESULT_OFFLOAD_TOOLS", "execute_query")
+result_offload_min_bytes = int(os.getenv("RESULT_OFFLOAD_MIN_BYTES", "4096"))
+result_preview_rows = int(os.getenv("RESULT_PREVIEW_ROWS", "10"))
+result_store_ttl = float(os.getenv("RESULT_STORE_TTL", "1800"))
+result_store_max_bytes = int(os.getenv("RESULT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Conversation memory for /chat requests that carry a conversation_id
+sessions_enabled = env_flag("SESSIONS_ENABLED", "true")
+session_max_sessions = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+session_max_bytes = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024)))
+session_keep_turns = int(os.getenv("SESSION_KEEP_TURNS", "3"))
+session_idle_ttl = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+session_spill_path = os.getenv("SESSION_SPILL_PATH", "")
+# Older tool outputs are sent to the LLM as short digests, within a token budget per call
+context_compaction_enabled = env_flag("CONTEXT_COMPACTION_ENABLED")
+context_keep_recent = int(os.getenv("CONTEXT_KEEP_RECENT", "2"))
+context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "24000"))
+context_digest_chars = int(os.getenv("CONTEXT_DIGEST_CHARS", "300"))
 
 
 evaluation_models = {
@@ -25,6 +67,10 @@ evaluation_models = {
     "ministral-3:14b": "cloud"
 }
 
+# Extra providers: provider name -> factory(model_name) returning a chat model
+# (used to register local stand-ins such as the benchmarks' scripted model)
+model_factories = {}
+
 connections = {
         "DOREMUS_MCP": {
             "transport": mcp_transport,
@@ -33,17 +79,175 @@ connections = {
 }
 
 client = ExtendedMCPClient(
-    connections=connections
+    connections=connections,
+    pool_size=mcp_pool_size,
+    idle_timeout=mcp_pool_idle_timeout,
+    health_check_interval=mcp_pool_health_check_interval,
 )
 
+# Shared by every model's agent, so read-only results (e.g. get_ontology) are fetched once per process
+tool_cache = ToolResultCache(
+    parse_cacheable_tools(tool_cache_tools) if tool_cache_tools else None,
+    max_entries=tool_cache_max_entries,
+    max_bytes=tool_cache_max_bytes,
+) if tool_cache_enabled else None
+
+# Shared by every model's agent, so a prefetch started by one run can serve another
+prefetcher = EntityPrefetcher(
+    top_k=prefetch_top_k,
+    max_inflight=prefetch_max_inflight,
+    ttl=prefetch_ttl,
+) if prefetch_enabled else None
+
+def _tool_cache_metrics():
+    if tool_cache is None:
+        return []
+    samples = {}
+    for tool, counters in tool_cache.stats.items():
+        samples[(("tool", tool), ("result", "hit"))] = counters["hits"]
+        samples[(("tool", tool), ("result", "miss"))] = counters["misses"]
+    return counter_lines("tool_cache_lookups_total", "Tool result cache lookups", samples)
+
+REGISTRY.add_collector(_tool_cache_metrics)
+
+def _prefetch_metrics():
+    if prefetcher is None:
+        return []
+    return counter_lines(
+        "tool_prefetch_total",
+        "Speculative get_entity_properties calls (started, skipped, failed, wasted) and lookups (hits, misses)",
+        {(("result", result),): count for result, count in prefetcher.stats.items()},
+    )
+
+REGISTRY.add_collector(_prefetch_metrics)
+
+# Shared by every model's agent and read by the /results endpoint
+result_store = ResultStore(
+    {t.strip() for t in result_offload_tools.split(",") if t.strip()},
+    min_bytes=result_offload_min_bytes,
+    preview_rows=result_preview_rows,
+    ttl=result_store_ttl,
+    max_bytes=result_store_max_bytes,
+) if result_offload_enabled else None
+
+# Offloaded results reach the model as previews: only then does the prompt explain them
+system_prompt = agent_system_prompt + result_preview_note if result_store is not None else agent_system_prompt
+
+# Checkpointer of the conversation agents, shared by every model (a conversation may switch models)
+session_store = SessionStore(
+    max_sessions=session_max_sessions,
+    max_session_bytes=session_max_bytes,
+    keep_turns=session_keep_turns,
+    idle_ttl=session_idle_ttl,
+    spill_path=session_spill_path or None,
+) if sessions_enabled else None
+
+# Shared by every model's agent (stateless apart from its counters)
+context_compactor = ContextCompactor(
+    system_prompt,
+    keep_recent=context_keep_recent,
+    max_tokens=context_token_budget,
+    digest_chars=context_digest_chars,
+) if context_compaction_enabled else None
+
+# Shared by every model's agent: the MCP tool list is fetched once per process, or
+# built from the on-disk snapshot and then revalidated against the live server
+_tool_catalog = None
+_tool_catalog_fingerprint = None
+_tool_catalog_lock = asyncio.Lock()
+_tool_catalog_listeners = []
+_revalidate_task = None
+
+def on_tool_catalog_change(callback):
+    """Register `callback(tools)`, called when revalidation swaps in a changed tool set."""
+    _tool_catalog_listeners.append(callback)
+
+async def _fetch_tool_definitions():
+    return {server: await client.list_mcp_tools(server) for server in connections}
+
+def _set_tool_catalog(definitions):
+    global _tool_catalog, _tool_catalog_fingerprint
+    tools = []
+    for server, server_tools in definitions.items():
+        tools.extend(client.tools_from_definitions(server, server_tools))
+    # Innermost, so latency and payload size are those of real MCP calls
+    tools = instrument_tools(tools)
+    if tool_cache is not None:
+        tools = tool_cache.wrap_tools(tools)
+    # Outside the cache, so speculative calls fill it too
+    if prefetcher is not None:
+        tools = prefetcher.wrap_tools(tools)
+    # Outside the cache, so cached results are offloaded too (under the same handle)
+    if result_store is not None:
+        tools = result_store.wrap_tools(tools)
+    _tool_catalog = tools
+    _tool_catalog_fingerprint = catalog_fingerprint(definitions)
+
+def _save_tool_snapshot(definitions):
+    if not tool_snapshot_path:
+        return
+    try:
+        save_snapshot(tool_snapshot_path, definitions, connections)
+    except OSError as e:
+        print(f"Could not write tool snapshot {tool_snapshot_path}: {e}")
+
+def _start_revalidation():
+    global _revalidate_task
+    if _revalidate_task is None or _revalidate_task.done():
+        _revalidate_task = asyncio.create_task(_revalidate_tool_catalog())
+
+async def _revalidate_tool_catalog():
+    while True:
+        try:
+            definitions = await _fetch_tool_definitions()
+        except Exception as e:
+            print(f"Tool catalog revalidation failed: {e}")
+        else:
+            if catalog_fingerprint(definitions) != _tool_catalog_fingerprint:
+                print("MCP tool catalog changed on the server, swapping in the new tool set")
+                _save_tool_snapshot(definitions)
+                _set_tool_catalog(definitions)
+                if tool_cache is not None:
+                    tool_cache.clear()
+                if prefetcher is not None:
+                    prefetcher.clear()
+                for callback in _tool_catalog_listeners:
+                    callback(_tool_catalog)
+        if tool_snapshot_refresh_interval <= 0:
+            return
+        await asyncio.sleep(tool_snapshot_refresh_interval)
+
+async def get_tool_catalog():
+    """Return the shared MCP tools, from the snapshot when available, else from the server."""
+    if _tool_catalog is not None:
+        return _tool_catalog
+    async with _tool_catalog_lock:
+        if _tool_catalog is None:
+            definitions = load_snapshot(tool_snapshot_path, connections) if tool_snapshot_path else None
+            if definitions is not None:
+                _set_tool_catalog(definitions)
+                _start_revalidation()
+            else:
+                definitions = await _fetch_tool_definitions()
+                _save_tool_snapshot(definitions)
+                _set_tool_catalog(definitions)
+                if tool_snapshot_refresh_interval > 0:
+                    _start_revalidation()
+    return _tool_catalog
+
 # Helper function to create model based on provider
+# Provider packages are imported on first use: a deployment usually needs only one or two
 def create_model(model_name: str):
     """Create a chat model based on provider"""
     provider = evaluation_models[model_name]
     
-    if provider == "openai":
+    if provider in model_factories:
+        return model_factories[provider](model_name)
+    elif provider == "openai":
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(model=model_name, temperature=0)
     elif provider == "cloud":
+        from langchain_ollama import ChatOllama
         return ChatOllama(
                 base_url="https://ollama.com",
                 model=model_name,
@@ -51,6 +255,7 @@ def create_model(model_name: str):
                 temperature=0
                 )
     elif provider == "ollama":
+        from langchain_ollama import ChatOllama
         return ChatOllama(
             base_url=os.getenv("OLLAMA_API_URL", "https://mcp-kg-ollama.tools.eurecom.fr"),
             model=model_name,
@@ -62,8 +267,18 @@ def create_model(model_name: str):
         raise ValueError(f"Unknown provider: {provider}")
     
 # AGENT LLM: Initialize the LLM, bind the tools from the MCP client
-async def initialize_agent(model_name: str = "gpt-5.2"):
-    tools = await client.get_tools()
+async def initialize_agent(model_name: str = "gpt-5.2", tool_names=None, checkpointer=None):
+    """
+    Build the ReAct agent for `model_name`.
+
+    Args:
+        model_name: A key of `evaluation_models`.
+        tool_names: Bind only these tools of the catalog (None binds all of them).
+        checkpointer: Checkpointer for conversation agents (runs then need a thread_id).
+    """
+    tools = await get_tool_catalog()
+    if tool_names is not None:
+        tools = [tool for tool in tools if tool.name in tool_names]
     llm = create_model(model_name)
     provider = evaluation_models[model_name]
 
@@ -71,12 +286,19 @@ async def initialize_agent(model_name: str = "gpt-5.2"):
     print(f"  provider: {provider}")
     print(f"  selected_model: {model_name}")
     print(f"  recursion_limit: {recursion_limit}")
-    print(f"  MCP server: {mcp_url}, transport type: {mcp_transport}\n")
+    print(f"  MCP server: {mcp_url}, transport type: {mcp_transport}")
+    print(f"  MCP session pool size: {mcp_pool_size}")
+    print(f"  tool result cache: {'on' if tool_cache is not None else 'off'}")
+    print(f"  entity prefetch: {f'top {prefetch_top_k}' if prefetcher is not None else 'off'}")
+    print(f"  result offloading: {'on' if result_store is not None else 'off'}")
+    print(f"  context compaction: {f'{context_token_budget} token budget' if context_compactor is not None else 'off'}")
+    print(f"  tools: {', '.join(sorted(tool.name for tool in tools)) if tool_names is not None else 'all'}\n")
 
     # Compile the agent using LangGraph's create_react_agent
     agent = create_react_agent(
         llm,
         tools=tools,
-        state_modifier=agent_system_prompt
+        state_modifier=context_compactor or system_prompt,
+        checkpointer=checkpointer,
     )
     return agent.with_config({"recursion_limit": recursion_limit})
\ No newline at end of file
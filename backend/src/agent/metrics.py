@@ -0,0 +1,194 @@
+import asyncio
+import functools
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterable
+
+from langchain_core.tools import BaseTool
+
+# Prometheus text exposition (format 0.0.4), without a client library dependency
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Process-wide set of metrics rendered by the /metrics endpoint.
+
+    Collectors are callables returning extra exposition lines at render time,
+    for values that already live elsewhere (e.g. cache hit counters).
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], list[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+MCP_TOOL_SECONDS = REGISTRY.histogram(
+    "mcp_tool_call_seconds", "MCP tool round-trip time (cache misses only)", ["tool", "status"]
+)
+MCP_TOOL_PAYLOAD_BYTES = REGISTRY.histogram(
+    "mcp_tool_payload_bytes", "Size of the result returned by an MCP tool", ["tool"], SIZE_BUCKETS
+)
+
+
+def _payload_size(result: Any) -> int:
+    content = result[0] if isinstance(result, tuple) else result
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    try:
+        return len(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def instrument_tool(tool: BaseTool) -> BaseTool:
+    """Return a copy of `tool` that records its latency and payload size."""
+    coroutine = getattr(tool, "coroutine", None)
+    if coroutine is None:
+        return tool
+
+    @functools.wraps(coroutine)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await coroutine(*args, **kwargs)
+            status = "ok"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            MCP_TOOL_SECONDS.observe(time.perf_counter() - started, tool=tool.name, status=status)
+        MCP_TOOL_PAYLOAD_BYTES.observe(_payload_size(result), tool=tool.name)
+        return result
+
+    return tool.model_copy(update={"coroutine": timed})
+
+
+def instrument_tools(tools: list[BaseTool]) -> list[BaseTool]:
+    return [instrument_tool(tool) for tool in tools]
+
+
+def counter_lines(name: str, documentation: str, samples: dict[tuple[tuple[str, str], ...], float]) -> list[str]:
+    """Exposition lines for a counter whose values are kept elsewhere (used by collectors)."""
+    return _sample_lines(name, documentation, "counter", samples)
+
+
+def gauge_lines(name: str, documentation: str, samples: dict[tuple[tuple[str, str], ...], float]) -> list[str]:
+    """Exposition lines for a gauge whose values are kept elsewhere (used by collectors)."""
+    return _sample_lines(name, documentation, "gauge", samples)
+
+
+def _sample_lines(name: str, documentation: str, kind: str, samples: dict) -> list[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        names = tuple(n for n, _ in labels)
+        values = tuple(v for _, v in labels)
+        lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+    return lines
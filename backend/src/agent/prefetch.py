@@ -0,0 +1,186 @@
+import asyncio
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+
+# Where candidate lists and their URIs are found in a find_candidate_entities result
+CANDIDATE_KEYS = ("matches", "candidates", "entities", "results")
+URI_KEYS = ("uri", "entity", "iri", "id")
+# Argument names that take the entity URI, in lookup order
+URI_ARGUMENTS = ("uri", "entity_uri", "entity", "iri")
+
+
+def _loads(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def candidate_uris(content: Any, top_k: int) -> list[str]:
+    """Return the first `top_k` distinct candidate URIs of a find_candidate_entities result."""
+    obj = _loads(content[0] if isinstance(content, tuple) else content)
+    if isinstance(obj, list) and len(obj) == 1 and isinstance(obj[0], dict) and "text" in obj[0]:
+        obj = _loads(obj[0]["text"])
+    if isinstance(obj, dict):
+        obj = next((obj[k] for k in CANDIDATE_KEYS if isinstance(obj.get(k), list)), None)
+    if not isinstance(obj, list):
+        return []
+
+    uris: list[str] = []
+    for item in obj:
+        if isinstance(item, dict):
+            item = next((item[k] for k in URI_KEYS if isinstance(item.get(k), str)), None)
+        if isinstance(item, str) and item.startswith("http") and item not in uris:
+            uris.append(item)
+            if len(uris) >= top_k:
+                break
+    return uris
+
+
+def uri_argument(tool: BaseTool) -> Optional[str]:
+    """Name of the argument of `tool` that takes the entity URI, if it can be told from its schema."""
+    properties = tool.args
+    for name in URI_ARGUMENTS:
+        if name in properties:
+            return name
+    schema = tool.args_schema if isinstance(tool.args_schema, dict) else {}
+    required = schema.get("required") or []
+    return required[0] if len(required) == 1 else None
+
+
+class EntityPrefetcher:
+    """
+    Speculative `get_entity_properties` calls for the top candidates of `find_candidate_entities`.
+
+    When a candidate lookup returns, the properties of its first `top_k` URIs
+    are fetched in the background; a later `get_entity_properties` call for one
+    of them waits for that fetch (or takes its result) instead of starting a
+    new round trip. At most `max_inflight` speculative calls run at once, and
+    prefetched results are kept for `ttl` seconds (`max_entries` at most).
+    """
+
+    def __init__(
+        self,
+        *,
+        trigger_tool: str = "find_candidate_entities",
+        target_tool: str = "get_entity_properties",
+        top_k: int = 2,
+        max_inflight: int = 4,
+        ttl: float = 300.0,
+        max_entries: int = 256,
+    ):
+        self.trigger_tool = trigger_tool
+        self.target_tool = target_tool
+        self.top_k = top_k
+        self.max_inflight = max_inflight
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[asyncio.Future, float]]" = OrderedDict()
+        self._used: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        # started: speculative calls issued; skipped: dropped by the in-flight cap;
+        # hits/misses: target calls served / not served by a prefetch; wasted: prefetches never used
+        self.stats = {"started": 0, "skipped": 0, "failed": 0, "hits": 0, "misses": 0, "wasted": 0}
+
+    def _drop(self, uri: str) -> None:
+        self._entries.pop(uri, None)
+        if uri in self._used:
+            self._used.discard(uri)
+        else:
+            self.stats["wasted"] += 1
+
+    def _get(self, uri: str) -> Optional[asyncio.Future]:
+        entry = self._entries.get(uri)
+        if entry is None:
+            return None
+        future, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._drop(uri)
+            return None
+        return future
+
+    def _prefetch(self, uris: list[str], fetch) -> None:
+        for uri in uris:
+            if self._get(uri) is not None:
+                continue
+            if len(self._tasks) >= self.max_inflight:
+                self.stats["skipped"] += 1
+                continue
+            self.stats["started"] += 1
+            task = asyncio.create_task(fetch(uri))
+            self._tasks.add(task)
+            task.add_done_callback(self._finished)
+            self._entries[uri] = (task, time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["failed"] += 1
+
+    async def _serve(self, uri: str, fetch) -> Any:
+        future = self._get(uri)
+        if future is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # our caller was cancelled, not the prefetch
+            except Exception:
+                pass  # the speculative call failed: make the real one
+            else:
+                self.stats["hits"] += 1
+                self._used.add(uri)
+                return result
+            self._entries.pop(uri, None)
+        self.stats["misses"] += 1
+        return await fetch()
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        """Return `tools` with the trigger and target tools wrapped (unchanged if either is missing)."""
+        by_name = {tool.name: tool for tool in tools}
+        trigger, target = by_name.get(self.trigger_tool), by_name.get(self.target_tool)
+        if trigger is None or target is None or trigger.coroutine is None or target.coroutine is None:
+            return tools
+        argument = uri_argument(target)
+        if argument is None:
+            print(f"Prefetch disabled: cannot tell which argument of {self.target_tool} takes the URI")
+            return tools
+
+        trigger_coroutine, target_coroutine = trigger.coroutine, target.coroutine
+
+        async def fetch(uri: str) -> Any:
+            return await target_coroutine(**{argument: uri})
+
+        @functools.wraps(trigger_coroutine)
+        async def find_and_prefetch(*args: Any, **kwargs: Any) -> Any:
+            result = await trigger_coroutine(*args, **kwargs)
+            self._prefetch(candidate_uris(result, self.top_k), fetch)
+            return result
+
+        @functools.wraps(target_coroutine)
+        async def prefetched(*args: Any, **kwargs: Any) -> Any:
+            uri = kwargs.get(argument)
+            # Only a call with nothing but the URI matches what was prefetched
+            others = [k for k, v in kwargs.items() if k != argument and v is not None]
+            if args or others or not isinstance(uri, str):
+                return await target_coroutine(*args, **kwargs)
+            return await self._serve(uri.strip(), lambda: target_coroutine(*args, **kwargs))
+
+        wrapped = {
+            self.trigger_tool: trigger.model_copy(update={"coroutine": find_and_prefetch}),
+            self.target_tool: target.model_copy(update={"coroutine": prefetched}),
+        }
+        return [wrapped.get(tool.name, tool) for tool in tools]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._used.clear()
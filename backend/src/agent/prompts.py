@@ -59,4 +59,8 @@ DO NOT THINK inside the tool calls.
 Answer only with results provided by the execution of the query.
 
 {guide}
-"""
\ No newline at end of file
+"""
+
+# Appended to the system prompt (after the guide's "Remember" list) when large results are offloaded
+result_preview_note = """- Large query results come back as a preview (row_count, columns, first rows) with a result_id; the user can see every row, so summarize the preview and the row count instead of listing everything
+"""
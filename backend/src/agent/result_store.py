@@ -0,0 +1,216 @@
+import functools
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+
+# Keys under which tools return their result rows, in lookup order
+ROW_KEYS = ("rows", "results", "bindings", "data", "items")
+
+
+def _loads(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _binding_value(value: Any) -> Any:
+    # SPARQL JSON bindings: {"var": {"type": "uri", "value": "..."}} -> {"var": "..."}
+    if isinstance(value, dict) and "value" in value and set(value) <= {"type", "value", "datatype", "xml:lang"}:
+        return value["value"]
+    return value
+
+
+def extract_table(content: Any) -> Optional[tuple[list[str], list[dict], dict]]:
+    """
+    Find the result rows in a tool result.
+
+    Understands a bare list of objects, an object holding such a list under one
+    of `ROW_KEYS`, and SPARQL JSON results ({"head": {"vars"}, "results": {"bindings"}}).
+
+    Returns:
+        (columns, rows, other top-level fields), or None if the result is not tabular.
+    """
+    obj = _loads(content)
+    # MCP text wrapper: [{"type": "text", "text": "{...}"}]
+    if isinstance(obj, list) and len(obj) == 1 and isinstance(obj[0], dict) and "text" in obj[0]:
+        obj = _loads(obj[0]["text"])
+    obj = _loads(obj)
+
+    meta: dict = {}
+    columns: list[str] = []
+    if isinstance(obj, list):
+        rows = obj
+    elif isinstance(obj, dict):
+        results = obj.get("results")
+        if isinstance(results, dict) and isinstance(results.get("bindings"), list):
+            columns = list((obj.get("head") or {}).get("vars") or [])
+            rows = [{k: _binding_value(v) for k, v in row.items()} for row in results["bindings"] if isinstance(row, dict)]
+            meta = {k: v for k, v in obj.items() if k not in ("head", "results")}
+        else:
+            key = next((k for k in ROW_KEYS if isinstance(obj.get(k), list)), None)
+            if key is None:
+                return None
+            rows = obj[key]
+            columns = list(obj.get("columns") or obj.get("vars") or [])
+            meta = {k: v for k, v in obj.items() if k not in (key, "columns", "vars")}
+    else:
+        return None
+
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        return None
+    if not columns:
+        seen: dict[str, None] = {}
+        for row in rows:
+            seen.update(dict.fromkeys(row))
+        columns = list(seen)
+    return columns, rows, meta
+
+
+class StoredResult:
+    __slots__ = ("id", "tool_name", "columns", "rows", "meta", "size", "expires_at")
+
+    def __init__(self, id: str, tool_name: str, columns: list[str], rows: list[dict], meta: dict, size: int, expires_at: float):
+        self.id = id
+        self.tool_name = tool_name
+        self.columns = columns
+        self.rows = rows
+        self.meta = meta
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResultStore:
+    """
+    Server-side store for large tabular tool results (e.g. `execute_query`).
+
+    A result larger than `min_bytes` is kept here under a handle and the LLM
+    receives a compact preview (row count, columns, first `preview_rows` rows)
+    instead of the full payload; the client pages through the full rows with
+    the handle. Entries expire after `ttl` seconds and the least recently used
+    ones are evicted beyond `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        tool_names: Optional[set[str]] = None,
+        *,
+        min_bytes: int = 4096,
+        preview_rows: int = 10,
+        ttl: float = 1800,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.tool_names = set(tool_names or {"execute_query"})
+        self.min_bytes = min_bytes
+        self.preview_rows = preview_rows
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {"offloaded": 0, "expired": 0, "evicted": 0, "bytes_saved": 0}
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        entry = self._entries.get(result_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._drop(result_id)
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(result_id)
+        return entry
+
+    def _drop(self, result_id: str) -> None:
+        entry = self._entries.pop(result_id)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for result_id in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            self._drop(result_id)
+            self.stats["expired"] += 1
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.stats["evicted"] += 1
+
+    def offload(self, tool_name: str, content: Any) -> Any:
+        """
+        Store a large tabular result and return the preview sent to the LLM.
+
+        Args:
+            tool_name: Name of the tool that produced the result
+            content: Tool result content (usually a JSON string)
+
+        Returns:
+            The preview as a JSON string, or `content` unchanged if it is small,
+            not tabular, or larger than the whole store.
+        """
+        if not isinstance(content, str):
+            return content
+        size = len(content.encode("utf-8"))
+        if size < self.min_bytes or size > self.max_bytes:
+            return content
+        table = extract_table(content)
+        if table is None:
+            return content
+        columns, rows, meta = table
+        if len(rows) <= self.preview_rows:
+            return content
+
+        # Same content, same handle: repeated queries (and cached answers) share one entry
+        result_id = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        if result_id in self._entries:
+            self._drop(result_id)
+        self._entries[result_id] = StoredResult(
+            result_id, tool_name, columns, rows, meta, size, time.monotonic() + self.ttl
+        )
+        self._bytes += size
+        self._evict()
+
+        preview = {
+            **meta,
+            "result_id": result_id,
+            "row_count": len(rows),
+            "columns": columns,
+            "preview_rows": rows[: self.preview_rows],
+            "note": (
+                f"Only the first {self.preview_rows} of {len(rows)} rows are shown here. "
+                "The full result is stored on the server and shown to the user."
+            ),
+        }
+        text = json.dumps(preview, ensure_ascii=False, default=str)
+        self.stats["offloaded"] += 1
+        self.stats["bytes_saved"] += max(0, size - len(text.encode("utf-8")))
+        return text
+
+    def wrap_tool(self, tool: BaseTool) -> BaseTool:
+        """Return a copy of `tool` whose large results are offloaded (unchanged if not listed)."""
+        coroutine = getattr(tool, "coroutine", None)
+        if tool.name not in self.tool_names or coroutine is None:
+            return tool
+
+        @functools.wraps(coroutine)
+        async def offloaded(*args: Any, **kwargs: Any) -> Any:
+            result = await coroutine(*args, **kwargs)
+            # MCP tools return (content, artifacts)
+            if isinstance(result, tuple) and len(result) == 2:
+                return self.offload(tool.name, result[0]), result[1]
+            return self.offload(tool.name, result)
+
+        return tool.model_copy(update={"coroutine": offloaded})
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        return [self.wrap_tool(tool) for tool in tools]
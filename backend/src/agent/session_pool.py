@@ -0,0 +1,278 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import anyio
+import httpx
+from langchain_mcp_adapters.sessions import create_session
+
+# Errors that mean the underlying transport is gone (as opposed to an MCP-level
+# error returned by the server). A session that raised one of these takes no new
+# calls and is closed once its calls in progress have ended.
+_RECONNECT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+    ConnectionError,
+    OSError,
+)
+# Raised when writing a request to a session whose stream is already closed: the
+# request never went out, so any call can safely be retried
+_UNSENT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+# Read-only DOREMUS tools, retried after any transport error. Query-builder tools
+# (build_query, add_triplet...) change server state and are only retried when the
+# request provably never reached the server.
+READ_ONLY_TOOLS = frozenset({"get_ontology", "find_candidate_entities", "get_entity_properties", "execute_query"})
+
+
+class _PooledSession:
+    """
+    A single initialized MCP session.
+
+    The session context is entered and exited by a dedicated task: the MCP
+    transports are built on anyio task groups, which must be closed from the
+    task that opened them, while pooled sessions are borrowed by many tasks.
+    """
+
+    def __init__(self, connection: dict[str, Any]):
+        self._connection = connection
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.session: Any = None
+        self.error: Optional[BaseException] = None
+        self.inflight = 0  # calls currently using the session
+        self.draining = False  # no new calls: closed once `inflight` drops to 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self, timeout: float) -> None:
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except BaseException:
+            await self.aclose()
+            raise
+        if self.error is not None:
+            raise self.error
+
+    async def _run(self) -> None:
+        try:
+            async with create_session(self._connection) as session:
+                await session.initialize()
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def aclose(self) -> None:
+        self._closing.set()
+        if self._task is not None and not self._task.done():
+            with suppress(BaseException):
+                await asyncio.wait_for(self._task, 5.0)
+
+
+class MCPSessionPool:
+    """
+    Pool of long-lived, initialized MCP sessions for a single server.
+
+    A ClientSession multiplexes concurrent requests, so sessions are shared:
+    each call goes to the least busy session, and a new one is opened (up to
+    `size`) only when every open session already has a call in progress.
+    Sessions are health-checked with a ping when they have been idle longer
+    than `health_check_interval`, and closed once idle for more than
+    `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        connection: dict[str, Any],
+        *,
+        size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        connect_timeout: float = 30.0,
+    ):
+        self.connection = connection
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self._sessions: list[_PooledSession] = []
+        self._open_lock = asyncio.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "reconnects": 0}
+
+    async def _open(self) -> _PooledSession:
+        conn = _PooledSession(self.connection)
+        await conn.start(self.connect_timeout)
+        self.stats["created"] += 1
+        return conn
+
+    async def _healthy(self, conn: _PooledSession) -> bool:
+        if not conn.alive:
+            return False
+        if time.monotonic() - conn.last_checked < self.health_check_interval:
+            return True
+        try:
+            await asyncio.wait_for(conn.session.send_ping(), self.connect_timeout)
+        except Exception:
+            return False
+        conn.last_checked = time.monotonic()
+        return True
+
+    def _retire(self, conn: _PooledSession) -> None:
+        """Stop handing out `conn`; it is closed now, or when its last call ends."""
+        if conn in self._sessions:
+            self._sessions.remove(conn)
+            self.stats["evicted"] += 1
+        conn.draining = True
+        if conn.inflight == 0:
+            asyncio.create_task(conn.aclose())
+
+    async def _checkout(self) -> _PooledSession:
+        await self._evict_idle()
+        while True:
+            for conn in [c for c in self._sessions if not c.alive]:
+                self._retire(conn)
+            conn = min(self._sessions, key=lambda c: c.inflight, default=None)
+            if conn is not None and (conn.inflight == 0 or len(self._sessions) >= self.size):
+                idle = conn.inflight == 0
+                conn.inflight += 1
+                # Only an idle session is pinged: a busy one shows it works with every answer
+                if idle and not await self._healthy(conn):
+                    conn.inflight -= 1
+                    self._retire(conn)
+                    continue
+                self.stats["reused"] += 1
+                return conn
+            async with self._open_lock:
+                # Another call may have opened a session while we waited
+                if len(self._sessions) >= self.size or any(c.alive and c.inflight == 0 for c in self._sessions):
+                    continue
+                conn = await self._open()
+                conn.inflight += 1
+                self._sessions.append(conn)
+                return conn
+
+    def _checkin(self, conn: _PooledSession) -> None:
+        conn.inflight -= 1
+        conn.last_used = time.monotonic()
+        if (self._closed or conn.draining or not conn.alive) and conn.inflight == 0:
+            if conn in self._sessions:
+                self._sessions.remove(conn)
+            asyncio.create_task(conn.aclose())
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for conn in list(self._sessions):
+            if conn.inflight == 0 and (not conn.alive or now - conn.last_used >= self.idle_timeout):
+                self._sessions.remove(conn)
+                self.stats["evicted"] += 1
+                await conn.aclose()
+
+    async def _reap_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            await self._evict_idle()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """
+        Use an initialized session from the pool, possibly shared with other calls.
+
+        Yields:
+            An initialized ClientSession
+        """
+        if self._closed:
+            raise RuntimeError("Session pool is closed.")
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+        conn = await self._checkout()
+        try:
+            yield conn.session
+            conn.last_checked = time.monotonic()
+        except _RECONNECT_ERRORS:
+            self._retire(conn)
+            raise
+        finally:
+            self._checkin(conn)
+
+    async def run(self, fn: Callable[[Any], Awaitable[Any]], *, idempotent: bool = False) -> Any:
+        """
+        Run `fn(session)` on a pooled session, retrying once on a fresh connection when safe.
+
+        Args:
+            fn: Coroutine function receiving the session
+            idempotent: Whether `fn` may run twice; otherwise only a request
+                that never went out (closed stream) is retried
+
+        Returns:
+            Whatever `fn` returns.
+        """
+        try:
+            async with self.acquire() as session:
+                return await fn(session)
+        except _UNSENT_ERRORS:
+            pass
+        except _RECONNECT_ERRORS:
+            if not idempotent:
+                raise
+        self.stats["reconnects"] += 1
+        async with self.acquire() as session:
+            return await fn(session)
+
+    async def aclose(self) -> None:
+        """Close every session (those in use once their calls end) and stop the idle reaper."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+        sessions, self._sessions = self._sessions, []
+        for conn in sessions:
+            conn.draining = True
+            if conn.inflight == 0:
+                await conn.aclose()
+
+
+class PooledSessionProxy:
+    """
+    Stand-in for a ClientSession that runs every call on a pooled session.
+
+    Passing it to the langchain-mcp-adapters loaders makes the resulting tools
+    reuse the pool instead of opening a new session per invocation. Only calls
+    to `read_only_tools` (and requests other than `call_tool`) are retried
+    after a transport error that may have reached the server.
+    """
+
+    def __init__(self, pool: MCPSessionPool, read_only_tools: frozenset = READ_ONLY_TOOLS):
+        self._pool = pool
+        self._read_only_tools = read_only_tools
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            if name == "call_tool":
+                tool = args[0] if args else kwargs.get("name")
+                idempotent = tool in self._read_only_tools
+            else:
+                idempotent = True
+            return await self._pool.run(
+                lambda session: getattr(session, name)(*args, **kwargs), idempotent=idempotent
+            )
+
+        return call
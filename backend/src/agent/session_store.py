@@ -0,0 +1,410 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+_URI_RE = re.compile(r"https?://[^\s\"'<>\\]+")
+RESOLVED_NOTE = "[Entities resolved in this turn:"
+
+
+class _Saved:
+    """One serialized checkpoint (channel values included) with its pending writes."""
+
+    __slots__ = ("checkpoint_id", "checkpoint", "metadata", "parent_id", "writes", "size")
+
+    def __init__(self, checkpoint_id: str, checkpoint: tuple, metadata: tuple, parent_id: Optional[str]):
+        self.checkpoint_id = checkpoint_id
+        self.checkpoint = checkpoint  # (type, bytes) from the serializer
+        self.metadata = metadata
+        self.parent_id = parent_id
+        self.writes: dict[tuple[str, int], tuple[str, str, tuple, str]] = {}
+        self.size = len(checkpoint[1]) + len(metadata[1])
+
+
+class _Session:
+    __slots__ = ("latest", "settled", "last_used", "busy")
+
+    def __init__(self):
+        self.latest: Optional[_Saved] = None  # last checkpoint written, possibly mid-run
+        self.settled: Optional[_Saved] = None  # state after the last completed turn
+        self.last_used = time.monotonic()
+        self.busy = False
+
+    @property
+    def size(self) -> int:
+        size = self.settled.size if self.settled is not None else 0
+        if self.latest is not None and self.latest is not self.settled:
+            size += self.latest.size + sum(len(w[2][1]) for w in self.latest.writes.values())
+        return size
+
+
+def _turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _collapse(turn: list[BaseMessage]) -> list[BaseMessage]:
+    """A turn reduced to its question and final answer, plus the entity URIs its tools resolved."""
+    question = turn[0] if isinstance(turn[0], HumanMessage) else None
+    answer = next(
+        (m for m in reversed(turn) if isinstance(m, AIMessage) and not m.tool_calls and m.content), None
+    )
+    if question is None or answer is None:
+        return [m for m in (question, answer) if m is not None]
+    if RESOLVED_NOTE in str(answer.content):
+        return [question, answer]
+    uris: list[str] = []
+    for message in turn:
+        if isinstance(message, ToolMessage):
+            text = str(message.content)
+        elif isinstance(message, AIMessage) and message.tool_calls:
+            text = " ".join(str(call.get("args")) for call in message.tool_calls)
+        else:
+            continue
+        for uri in _URI_RE.findall(text):
+            if uri not in uris:
+                uris.append(uri)
+    if uris:
+        note = f"\n\n{RESOLVED_NOTE} {', '.join(uris[:12])}]"
+        answer = answer.model_copy(update={"content": str(answer.content) + note})
+    return [question, answer]
+
+
+class SessionStore(BaseCheckpointSaver):
+    """
+    Bounded LangGraph checkpointer for /chat conversations (one thread per conversation).
+
+    Only the latest checkpoint of a thread is kept, plus the one reached by
+    its last completed turn: `commit` settles a finished turn and `rollback`
+    drops the checkpoints of a failed or cancelled one, so the conversation
+    never continues from a half-run. On commit, turns older than the last
+    `keep_turns` are collapsed to their question and final answer (with the
+    entity URIs their tools resolved, so follow-ups can reuse them), and the
+    oldest turns are dropped until the session fits in `max_session_bytes`.
+
+    At most `max_sessions` sessions stay in memory; the least recently used
+    one is evicted, to the SQLite file `spill_path` when one is configured
+    (and loaded back on its next message). Sessions idle for `idle_ttl`
+    seconds are deleted.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 1000,
+        max_session_bytes: int = 256 * 1024,
+        keep_turns: int = 3,
+        idle_ttl: float = 3600.0,
+        spill_path: Optional[str] = None,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes
+        self.keep_turns = max(1, keep_turns)
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if spill_path:
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "thread_id TEXT PRIMARY KEY, checkpoint_id TEXT, checkpoint_type TEXT, checkpoint BLOB, "
+                "metadata_type TEXT, metadata BLOB, updated_at REAL)"
+            )
+            self._db.commit()
+        self.stats = {"trimmed_turns": 0, "rolled_back": 0, "spilled": 0, "loaded": 0, "evicted": 0, "expired": 0}
+
+    # --- sessions -----------------------------------------------------------------
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _resize(self, session: _Session, update) -> None:
+        before = session.size
+        update()
+        self._bytes += session.size - before
+
+    def _session(self, thread_id: str, create: bool) -> Optional[_Session]:
+        session = self._sessions.get(thread_id)
+        if session is None:
+            session = self._load(thread_id)
+            if session is None and not create:
+                return None
+            if session is None:
+                session = _Session()
+            self._sessions[thread_id] = session
+            self._bytes += session.size
+            self._evict()
+        self._sessions.move_to_end(thread_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def _evict(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            thread_id, session = next(
+                ((t, s) for t, s in self._sessions.items() if not s.busy), (None, None)
+            )
+            if thread_id is None:
+                return
+            del self._sessions[thread_id]
+            self._bytes -= session.size
+            if self._db is not None and session.settled is not None:
+                self._spill(thread_id, session.settled)
+            else:
+                self.stats["evicted"] += 1
+
+    def _spill(self, thread_id: str, saved: _Saved) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, saved.checkpoint_id, saved.checkpoint[0], saved.checkpoint[1],
+             saved.metadata[0], saved.metadata[1], time.time()),
+        )
+        self._db.commit()
+        self.stats["spilled"] += 1
+
+    def _load(self, thread_id: str) -> Optional[_Session]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata, updated_at "
+            "FROM sessions WHERE thread_id = ?",
+            (thread_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+        self._db.commit()
+        if time.time() - row[5] > self.idle_ttl:
+            self.stats["expired"] += 1
+            return None
+        session = _Session()
+        session.latest = session.settled = _Saved(row[0], (row[1], row[2]), (row[3], row[4]), None)
+        self.stats["loaded"] += 1
+        return session
+
+    def begin(self, thread_id: str) -> bool:
+        """Mark a turn of `thread_id` as running; False if one is already running."""
+        with self._lock:
+            session = self._session(thread_id, create=True)
+            if session.busy:
+                return False
+            session.busy = True
+            return True
+
+    def commit(self, thread_id: str) -> None:
+        """The turn completed: its final checkpoint becomes the session state, trimmed to the limits."""
+        with self._lock:
+            session = self._sessions.get(thread_id)
+            if session is None:
+                return
+            session.busy = False
+            if session.latest is not None:
+                self._resize(session, lambda: self._settle(session))
+
+    def rollback(self, thread_id: str) -> None:
+        """The turn failed or was cancelled: forget its checkpoints."""
+        with self._lock:
+            session = self._sessions.get(thread_id)
+            if session is None:
+                return
+            session.busy = False
+            if session.latest is not session.settled:
+                self.stats["rolled_back"] += 1
+                self._resize(session, lambda: setattr(session, "latest", session.settled))
+            if session.settled is None:
+                del self._sessions[thread_id]
+
+    def evict_idle(self) -> int:
+        """Delete sessions idle for longer than `idle_ttl` (in memory and spilled); return how many."""
+        with self._lock:
+            cutoff = time.monotonic() - self.idle_ttl
+            idle = [t for t, s in self._sessions.items() if s.last_used < cutoff and not s.busy]
+            for thread_id in idle:
+                self._bytes -= self._sessions.pop(thread_id).size
+            expired = len(idle)
+            if self._db is not None:
+                expired += self._db.execute(
+                    "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.idle_ttl,)
+                ).rowcount
+                self._db.commit()
+            self.stats["expired"] += expired
+            return expired
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(thread_id, None)
+            if session is not None:
+                self._bytes -= session.size
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+                self._db.commit()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    # --- trimming -----------------------------------------------------------------
+
+    def _settle(self, session: _Session) -> None:
+        saved = session.latest
+        checkpoint = self.serde.loads_typed(saved.checkpoint)
+        messages = list(checkpoint["channel_values"].get("messages") or [])
+        turns = _turns(messages)
+        trimmed = [_collapse(t) if i < len(turns) - self.keep_turns else t for i, t in enumerate(turns)]
+        changed = trimmed != turns
+
+        def serialized(turn_list: list[list[BaseMessage]]) -> tuple:
+            checkpoint["channel_values"]["messages"] = [m for turn in turn_list for m in turn]
+            return self.serde.dumps_typed(checkpoint)
+
+        blob = serialized(trimmed) if changed else saved.checkpoint
+        # Over the byte cap: drop the oldest turns (the latest one always stays)
+        while len(blob[1]) + len(saved.metadata[1]) > self.max_session_bytes and len(trimmed) > 1:
+            trimmed.pop(0)
+            self.stats["trimmed_turns"] += 1
+            if len(trimmed) <= self.keep_turns:
+                trimmed = [_collapse(t) for t in trimmed[:-1]] + trimmed[-1:]
+            blob = serialized(trimmed)
+        if blob is not saved.checkpoint:
+            saved = _Saved(saved.checkpoint_id, blob, saved.metadata, None)
+        saved.writes = {}
+        session.latest = session.settled = saved
+
+    # --- BaseCheckpointSaver -------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        if checkpoint_ns:
+            return None  # no subgraphs in the ReAct agent
+        with self._lock:
+            session = self._session(thread_id, create=False)
+            saved = session.latest if session is not None else None
+        checkpoint_id = get_checkpoint_id(config)
+        if saved is None or (checkpoint_id and checkpoint_id != saved.checkpoint_id):
+            return None
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": saved.checkpoint_id}},
+            checkpoint=self.serde.loads_typed(saved.checkpoint),
+            metadata=self.serde.loads_typed(saved.metadata),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": saved.parent_id}}
+                if saved.parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value, _ in saved.writes.values()],
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # History is not kept: the latest checkpoint is the only one to list
+        if config is None or before is not None:
+            return
+        checkpoint_tuple = self.get_tuple(config)
+        if checkpoint_tuple is not None and all(checkpoint_tuple.metadata.get(k) == v for k, v in (filter or {}).items()):
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        saved = _Saved(
+            checkpoint["id"],
+            self.serde.dumps_typed(checkpoint),
+            self.serde.dumps_typed({**config.get("metadata", {}), **metadata}),
+            config["configurable"].get("checkpoint_id"),
+        )
+        with self._lock:
+            session = self._session(thread_id, create=True)
+            self._resize(session, lambda: setattr(session, "latest", saved))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            session = self._sessions.get(thread_id)
+            saved = session.latest if session is not None else None
+            if saved is None or saved.checkpoint_id != checkpoint_id:
+                return
+
+            def add():
+                for idx, (channel, value) in enumerate(writes):
+                    key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                    if key[1] >= 0 and key in saved.writes:
+                        continue
+                    saved.writes[key] = (task_id, channel, self.serde.dumps_typed(value), task_path)
+
+            self._resize(session, add)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
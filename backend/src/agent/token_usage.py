@@ -0,0 +1,61 @@
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """
+    Sums the token usage reported by every LLM call it sees.
+
+    Usage comes from the message's `usage_metadata`, or from the provider's
+    `token_usage` in `llm_output`. Calls that report neither (some providers
+    only report usage when asked to while streaming) are counted in
+    `unreported`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.usage = {"llm_calls": 0, "unreported": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.usage["llm_calls"] += 1
+        usage = None
+        for generations in response.generations:
+            for generation in generations:
+                if isinstance(generation, ChatGeneration) and isinstance(generation.message, AIMessage):
+                    usage = generation.message.usage_metadata or usage
+        if usage is None:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            if token_usage:
+                usage = {
+                    "input_tokens": token_usage.get("prompt_tokens", 0),
+                    "output_tokens": token_usage.get("completion_tokens", 0),
+                    "total_tokens": token_usage.get("total_tokens", 0),
+                }
+        if not usage:
+            self.usage["unreported"] += 1
+            return
+        for key in ("input_tokens", "output_tokens", "total_tokens"):
+            self.usage[key] += usage.get(key) or 0
+
+
+# Handler of the run driven by the current task, added to every LLM call made in it (see `track_tokens`)
+_RUN_HANDLER: ContextVar[Optional[TokenUsageHandler]] = ContextVar("token_usage_handler", default=None)
+register_configure_hook(_RUN_HANDLER, inheritable=True)
+
+
+def track_tokens() -> dict:
+    """
+    Start counting the tokens of the run driven by the current task.
+
+    The returned dict is updated by every LLM call of the run (including calls
+    made in tasks started from this one): `llm_calls`, `unreported` (calls
+    without usage data), and `input_tokens`/`output_tokens`/`total_tokens`.
+    """
+    handler = TokenUsageHandler()
+    _RUN_HANDLER.set(handler)
+    return handler.usage
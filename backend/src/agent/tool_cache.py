@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+
+# Read-only DOREMUS tools and their TTL in seconds. `None` means the entry never
+# expires and is never evicted (the ontology does not change while we run).
+DEFAULT_CACHEABLE_TOOLS: dict[str, Optional[float]] = {
+    "get_ontology": None,
+    "find_candidate_entities": 3600.0,
+    "get_entity_properties": 3600.0,
+}
+
+# Tools whose result only depends on some of their arguments. A call is cached
+# only when it passes all of them, and keyed on them alone: `execute_query` with a
+# `query_id` runs whatever the (shared, mutable) builder holds under that id, so
+# only calls with raw `sparql` text may be cached.
+CONTENT_KEYED_TOOLS: dict[str, tuple[str, ...]] = {
+    "execute_query": ("sparql",),
+}
+
+
+def parse_cacheable_tools(spec: str) -> dict[str, Optional[float]]:
+    """
+    Parse an allow-list such as "get_ontology,get_entity_properties:300".
+
+    A tool without an explicit TTL keeps its default TTL (or 1 hour if it has none).
+    A TTL of 0 or "inf" pins the entry in memory.
+    """
+    tools: dict[str, Optional[float]] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, ttl = item.partition(":")
+        name = name.strip()
+        if not ttl:
+            tools[name] = DEFAULT_CACHEABLE_TOOLS.get(name, 3600.0)
+        elif ttl.strip().lower() in ("0", "inf", "none"):
+            tools[name] = None
+        else:
+            tools[name] = float(ttl)
+    return tools
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(tool_name: str, arguments: dict[str, Any]) -> str:
+    """Build a cache key from the tool name and its normalized arguments."""
+    args = _normalize({k: v for k, v in arguments.items() if k not in ("runtime", "callbacks", "config")})
+    return tool_name + ":" + json.dumps(args, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _result_size(result: Any) -> int:
+    content = result[0] if isinstance(result, tuple) else result
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    try:
+        return len(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return len(str(content).encode("utf-8"))
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ToolResultCache:
+    """
+    LRU cache of tool results keyed on (tool name, normalized arguments).
+
+    Only tools in the allow-list are cached, so stateful query builders such as
+    `build_query` or `add_triplet` always reach the server (and `execute_query`
+    is only cached when called with raw SPARQL, see `CONTENT_KEYED_TOOLS`). The cache is bounded
+    by entry count and by approximate payload bytes; identical calls that arrive
+    while a result is being fetched wait for that fetch instead of repeating it.
+    """
+
+    def __init__(
+        self,
+        cacheable_tools: Optional[dict[str, Optional[float]]] = None,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.cacheable_tools = dict(DEFAULT_CACHEABLE_TOOLS if cacheable_tools is None else cacheable_tools)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, tool_name: str, field: str) -> None:
+        counters = self.stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._drop(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry.value
+
+    def put(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = _Entry(value, size, expires_at)
+        self._bytes += size
+        self._evict()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        # Walk from least recently used; pinned entries (no TTL) are skipped.
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            if self._entries[key].expires_at is not None:
+                self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    async def call(self, tool_name: str, arguments: dict[str, Any], fetch) -> Any:
+        """
+        Return the cached result for a call, or run `fetch()` and cache it.
+
+        Args:
+            tool_name: Name of the tool being called
+            arguments: Tool arguments (used for the key)
+            fetch: Zero-argument coroutine function performing the real call
+
+        Returns:
+            The tool result.
+        """
+        key_args = CONTENT_KEYED_TOOLS.get(tool_name)
+        if key_args is not None:
+            if not all(arguments.get(name) for name in key_args):
+                return await fetch()
+            arguments = {name: arguments[name] for name in key_args}
+        key = cache_key(tool_name, arguments)
+        hit, value = self.get(key)
+        if hit:
+            self._count(tool_name, "hits")
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            await asyncio.wait({pending})
+            if not pending.cancelled():
+                self._count(tool_name, "hits")
+                return pending.result()
+            # The call we were waiting on was cancelled: fetch it ourselves
+            return await self.call(tool_name, arguments, fetch)
+
+        self._count(tool_name, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters re-raise it
+            raise
+        else:
+            self.put(key, value, self.cacheable_tools.get(tool_name))
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def wrap_tool(self, tool: BaseTool) -> BaseTool:
+        """Return a copy of `tool` whose calls go through the cache (unchanged if not allow-listed)."""
+        coroutine = getattr(tool, "coroutine", None)
+        if tool.name not in self.cacheable_tools or coroutine is None:
+            return tool
+
+        @functools.wraps(coroutine)
+        async def cached(*args: Any, **kwargs: Any) -> Any:
+            return await self.call(tool.name, kwargs, lambda: coroutine(*args, **kwargs))
+
+        return tool.model_copy(update={"coroutine": cached})
+
+    def wrap_tools(self, tools: list[BaseTool]) -> list[BaseTool]:
+        return [self.wrap_tool(tool) for tool in tools]
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+
+from mcp.types import Tool as MCPTool
+
+# Bump when the file layout changes; older snapshots are ignored and rewritten.
+SNAPSHOT_VERSION = 1
+
+
+def catalog_fingerprint(catalog: dict[str, list[MCPTool]]) -> str:
+    """Stable hash of every server's tool names, descriptions and schemas."""
+    canonical = {
+        server: sorted((t.model_dump(mode="json", exclude_none=True) for t in tools), key=lambda t: t["name"])
+        for server, tools in catalog.items()
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_snapshot(path: str, catalog: dict[str, list[MCPTool]], connections: dict[str, Any]) -> None:
+    """
+    Write the discovered tool definitions of every server to `path` (atomically).
+
+    Args:
+        path: Snapshot file location
+        catalog: Tool definitions per server name
+        connections: Connection configs, used to invalidate the snapshot when a URL changes
+    """
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "fingerprint": catalog_fingerprint(catalog),
+        "servers": {
+            server: {
+                "url": connections.get(server, {}).get("url"),
+                "tools": [t.model_dump(mode="json", exclude_none=True) for t in tools],
+            }
+            for server, tools in catalog.items()
+        },
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, connections: dict[str, Any]) -> Optional[dict[str, list[MCPTool]]]:
+    """
+    Read tool definitions from `path`.
+
+    Returns:
+        Tool definitions per server, or None if the file is missing, unreadable,
+        from another snapshot version, or does not match the configured servers.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    servers = data.get("servers") or {}
+    if set(servers) != set(connections):
+        return None
+    catalog: dict[str, list[MCPTool]] = {}
+    try:
+        for server, entry in servers.items():
+            if entry.get("url") != connections[server].get("url"):
+                return None
+            catalog[server] = [MCPTool.model_validate(t) for t in entry.get("tools") or []]
+    except Exception:
+        return None
+    return catalog
@@ -0,0 +1,310 @@
+"""
+Batch evaluation: run a JSONL question set across several models at once.
+
+Each input line is a JSON object with a `question` (or `message`), an
+optional `id` (the line number otherwise) and optional `models` overriding
+the models given on the command line; other fields (an expected answer...)
+are copied to the results. Every (question, model) job writes one JSON line
+to the output as soon as it finishes: answer, generated SPARQL, tool trace,
+latency and token counts. The output doubles as the checkpoint: run the same
+command again and completed jobs are skipped, failed ones retried.
+
+Run from backend/src (the MCP server and provider keys come from .env):
+
+    python batch_eval.py questions.jsonl --models gpt-4.1,qwen3-coder:30b --output results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+# Runs: (question, model) -> the run's chat events
+RunFn = Callable[[str, str], AsyncIterator[dict]]
+
+# batches: runs of run_batch; completed / failed: finished jobs; skipped: jobs already in the checkpoint
+BATCH_STATS = {"batches": 0, "completed": 0, "failed": 0, "skipped": 0}
+
+_RESERVED = ("id", "question", "message", "models")
+
+
+def load_questions(lines: Iterable[str]) -> list[dict]:
+    """
+    Parse JSONL question lines (blank lines and `#` comments are skipped).
+
+    Raises:
+        ValueError: If a line is not a JSON object with a question, or an id repeats.
+    """
+    questions = []
+    seen = set()
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {n}: invalid JSON ({e})") from None
+        text = (item.get("question") or item.get("message")) if isinstance(item, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError(f"Line {n}: expected an object with a \"question\"")
+        question_id = str(item.get("id", n))
+        if question_id in seen:
+            raise ValueError(f"Line {n}: duplicate id {question_id!r}")
+        seen.add(question_id)
+        models = item.get("models")
+        questions.append({
+            "id": question_id,
+            "question": text,
+            "models": [models] if isinstance(models, str) else models,
+            "extra": {k: v for k, v in item.items() if k not in _RESERVED},
+        })
+    return questions
+
+
+def completed_jobs(path: str) -> set[tuple[str, str]]:
+    """(question id, model) of the jobs recorded as completed in a results file (missing file: none)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            if isinstance(record, dict) and record.get("status") == "completed":
+                done.add((str(record.get("id")), record.get("model")))
+    return done
+
+
+class ResultsFile:
+    """Appends result records to a JSONL file, one flushed line per record."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # A crash may have left a partial last line: start on a fresh one
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+async def _record(question: dict, model: str, provider: str, events: AsyncIterator[dict]) -> dict:
+    """Run one job and summarize its events."""
+    started = time.perf_counter()
+    answer: list[str] = []
+    tools: dict[str, dict] = {}
+    sparql = None
+    error = None
+    timing = None
+    try:
+        async for event in events:
+            kind = event.get("type")
+            data = event.get("data")
+            if kind == "message" and isinstance(data, str):
+                answer.append(data)
+            elif kind == "tool_start":
+                tools[data.get("id") or str(len(tools))] = {
+                    "name": data.get("name"),
+                    "args": data.get("args"),
+                    "status": "running",
+                    "started": time.perf_counter(),
+                }
+            elif kind in ("tool_end", "tool_error"):
+                call = tools.get(data.get("id"))
+                if call is not None and call["status"] == "running":
+                    call["status"] = "success" if kind == "tool_end" else "error"
+                    call["ms"] = round((time.perf_counter() - call.pop("started")) * 1000, 1)
+                    if kind == "tool_error":
+                        call["error"] = data.get("error")
+            elif kind == "sparql_update":
+                sparql = data
+            elif kind == "timing":
+                timing = data
+            elif kind == "error":
+                error = str(data)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    for call in tools.values():
+        call.pop("started", None)
+
+    text = "".join(answer)
+    if error is None and not text:
+        error = "No answer"
+    timing = timing or {}
+    return {
+        **question["extra"],
+        "id": question["id"],
+        "model": model,
+        "provider": provider,
+        "question": question["question"],
+        "status": "completed" if error is None else "error",
+        "error": error,
+        "answer": text,
+        "sparql": sparql,
+        "tools": list(tools.values()),
+        "latency": {
+            "queue_ms": timing.get("queue_ms"),
+            "ttft_ms": timing.get("ttft_ms"),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+        "llm_turns": timing.get("llm_turns"),
+        "tokens": timing.get("tokens"),
+    }
+
+
+def batch_jobs(
+    questions: list[dict],
+    models: list[str],
+    providers: dict[str, str],
+    done: Iterable[tuple[str, str]] = (),
+) -> tuple[list[tuple[dict, str]], int]:
+    """
+    The (question, model) jobs of a batch: every question on every model, or on its own `models`.
+
+    Returns:
+        The jobs left to run, and how many were skipped because they are in `done`.
+
+    Raises:
+        ValueError: If a job names a model missing from `providers`.
+    """
+    done = set(done)
+    jobs = []
+    skipped = 0
+    for question in questions:
+        for model in question["models"] or models:
+            if model not in providers:
+                raise ValueError(f"Unknown model {model!r} (question {question['id']})")
+            if (question["id"], model) in done:
+                skipped += 1
+            else:
+                jobs.append((question, model))
+    return jobs, skipped
+
+
+async def run_batch(
+    questions: list[dict],
+    models: list[str],
+    run: RunFn,
+    *,
+    providers: dict[str, str],
+    concurrency: int = 2,
+    limits: Optional[dict[str, int]] = None,
+    done: Iterable[tuple[str, str]] = (),
+) -> AsyncIterator[dict]:
+    """
+    Run the jobs of `batch_jobs`, yielding their results as they finish.
+
+    Jobs of one provider run at most `concurrency` at a time (or
+    `limits[provider]`), while different providers run side by side.
+
+    Raises:
+        ValueError: If a job names a model missing from `providers`.
+    """
+    jobs, skipped = batch_jobs(questions, models, providers, done)
+    queues: dict[str, deque] = {}
+    for question, model in jobs:
+        queues.setdefault(providers[model], deque()).append((question, model))
+    BATCH_STATS["batches"] += 1
+    BATCH_STATS["skipped"] += skipped
+
+    results: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def worker(provider: str, jobs: deque) -> None:
+        try:
+            while jobs:
+                question, model = jobs.popleft()
+                record = await _record(question, model, provider, run(question["question"], model))
+                BATCH_STATS["completed" if record["status"] == "completed" else "failed"] += 1
+                results.put_nowait(record)
+        finally:
+            results.put_nowait(finished)
+
+    workers = [
+        asyncio.create_task(worker(provider, jobs))
+        for provider, jobs in queues.items()
+        for _ in range(max(1, min(len(jobs), (limits or {}).get(provider, concurrency))))
+    ]
+    try:
+        remaining = len(workers)
+        while remaining:
+            record = await results.get()
+            if record is finished:
+                remaining -= 1
+            else:
+                yield record
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import server  # the app's agents, caches and provider slots
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = load_questions(f)
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    done = set() if args.restart else completed_jobs(args.output)
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    out = ResultsFile(args.output)
+    counts = {"completed": 0, "error": 0}
+    started = time.perf_counter()
+    try:
+        async for record in run_batch(
+            questions,
+            models,
+            server.batch_job_events,
+            providers=server.evaluation_models,
+            concurrency=args.concurrency,
+            done=done,
+        ):
+            out.write(record)
+            counts[record["status"]] += 1
+            print(
+                f"[{record['status']}] {record['id']} {record['model']} "
+                f"{record['latency']['total_ms'] / 1000:.1f}s {record['error'] or ''}".rstrip()
+            )
+    finally:
+        out.close()
+        await server.client.aclose()
+    print(
+        f"{counts['completed']} completed, {counts['error']} failed, {len(done)} already done "
+        f"in {time.perf_counter() - started:.1f}s -> {args.output}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", help="JSONL file of questions")
+    parser.add_argument("--models", required=True, help="comma-separated keys of evaluation_models")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results file, also the checkpoint")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("BATCH_PROVIDER_CONCURRENCY", "2")),
+        help="jobs run at the same time per provider",
+    )
+    parser.add_argument("--restart", action="store_true", help="discard the results file instead of resuming")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
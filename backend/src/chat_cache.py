@@ -0,0 +1,116 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from chat_runs import ChatRun
+
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.]+$")
+
+
+def chat_cache_key(message: str, model: str) -> str:
+    """Key a question on the model and its case/whitespace/punctuation-normalized text."""
+    text = " ".join((message or "").split()).casefold()
+    return f"{model}\x00{_TRAILING_PUNCT_RE.sub('', text)}"
+
+
+class ChatResponseCache:
+    """
+    Cache of complete /chat event sequences keyed on (normalized message, model).
+
+    A hit replays the recorded events without touching the agent. While a run
+    is in progress, identical questions follow its event stream instead of
+    starting another agent execution. Only runs that finished without an
+    `error` event and produced an answer from the requested model are stored.
+    """
+
+    def __init__(self, *, ttl: float = 900.0, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple[list[dict], float, int]]" = OrderedDict()
+        self._inflight: dict[str, ChatRun] = {}
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _get(self, key: str) -> Optional[list[dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        events, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return events
+
+    def _store(self, key: str, events: list[dict]) -> None:
+        size = len(json.dumps(events, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (events, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def attach(self, key: str) -> Optional[AsyncIterator[dict]]:
+        """
+        Return an event stream for `key` if it is cached or already running.
+
+        Returns:
+            An async iterator of events, or None on a miss.
+        """
+        events = self._get(key)
+        if events is not None:
+            self.stats["hits"] += 1
+            return _replay(events)
+        run = self._inflight.get(key)
+        if run is not None:
+            self.stats["coalesced"] += 1
+            return run.follow()
+        return None
+
+    def record(self, key: str, run: ChatRun) -> ChatRun:
+        """
+        Start `run`, recording its events under `key`.
+
+        If an identical run is already in progress, `run` is discarded and
+        that one is returned instead.
+
+        Returns:
+            The started run to follow.
+        """
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.stats["coalesced"] += 1
+            return existing
+        self.stats["misses"] += 1
+        self._inflight[key] = run
+        run.add_done_callback(lambda r: self._finish(key, r))
+        return run.start()
+
+    def _finish(self, key: str, run: ChatRun) -> None:
+        if self._inflight.get(key) is run:
+            del self._inflight[key]
+        # A run whose buffer dropped its first events cannot be replayed, and one
+        # answered by another model (`route` event) would be cached under the wrong one
+        if (
+            run.status == "completed"
+            and run.first_seq == 0
+            and any(e.get("type") == "message" for e in run.events)
+            and not any(e.get("type") == "route" for e in run.events)
+        ):
+            # Queue positions and timings describe this run, not the answer
+            self._store(key, [e for e in run.events if e.get("type") not in ("queue", "timing")])
+
+
+async def _replay(events: list[dict]) -> AsyncIterator[dict]:
+    for event in events:
+        yield event
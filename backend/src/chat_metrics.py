@@ -0,0 +1,131 @@
+import time
+from typing import Optional
+
+from agent.metrics import COUNT_BUCKETS, REGISTRY, SIZE_BUCKETS
+
+CHAT_REQUESTS = REGISTRY.counter(
+    "chat_requests_total", "Finished /chat runs by outcome", ["model", "provider", "status"]
+)
+CHAT_TTFT_SECONDS = REGISTRY.histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from request arrival to the first answer chunk",
+    ["model", "provider", "source"],
+)
+CHAT_RUN_SECONDS = REGISTRY.histogram(
+    "chat_run_seconds", "Time from request arrival to the end of the run", ["model", "provider", "status"]
+)
+CHAT_QUEUE_SECONDS = REGISTRY.histogram(
+    "chat_queue_wait_seconds", "Time spent waiting for a provider slot", ["model", "provider"]
+)
+CHAT_LLM_TURNS = REGISTRY.histogram(
+    "chat_llm_turns", "LLM calls per run (tool-call rounds plus the final answer)", ["model", "provider"], COUNT_BUCKETS
+)
+CHAT_TOOL_CALLS = REGISTRY.histogram(
+    "chat_tool_calls", "Tool calls per run", ["model", "provider"], COUNT_BUCKETS
+)
+CHAT_TOOL_SECONDS = REGISTRY.histogram(
+    "chat_tool_seconds", "Tool call time as seen by the agent (cache hits included)", ["model", "tool"]
+)
+CHAT_LLM_TOKENS = REGISTRY.counter(
+    "chat_llm_tokens_total", "LLM tokens reported by the providers, by kind (input/output)", ["model", "provider", "kind"]
+)
+CHAT_CONTEXT_TOKENS_SAVED = REGISTRY.histogram(
+    "chat_context_tokens_saved",
+    "Estimated prompt tokens saved per run by compacting old tool outputs (summed over its LLM calls)",
+    ["model", "provider"],
+    SIZE_BUCKETS,
+)
+AGENT_INIT_SECONDS = REGISTRY.histogram(
+    "agent_init_seconds", "Time to build an agent (first request per model)", ["model", "provider"]
+)
+
+
+class RunTiming:
+    """
+    Latency breakdown of one /chat request, built from the events it streams.
+
+    `observe` is called for every event; `summary` is the payload of the
+    optional `timing` SSE event and `finish` records the histograms.
+    """
+
+    def __init__(self, model: str, provider: str):
+        self.model = model
+        self.provider = provider
+        self.started_at = time.perf_counter()
+        self.agent_init: Optional[float] = None
+        self.queue_wait: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.cached = False
+        self.context: Optional[dict] = None  # context compaction counters of the run, when enabled
+        self.tokens: Optional[dict] = None  # token usage reported by the LLM calls of the run
+        self.tool_calls = 0
+        self.llm_turns = 0
+        self.tools: dict[str, list] = {}  # name -> [calls, seconds]
+        self._pending: dict[Optional[str], tuple[str, float]] = {}
+        self._phase: Optional[str] = None  # "llm" while an answer streams, "tools" during a tool round
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def observe(self, event: dict) -> None:
+        kind = event.get("type")
+        if kind == "message":
+            if self.ttft is None:
+                self.ttft = self.elapsed()
+            if self._phase is None or (self._phase == "tools" and not self._pending):
+                self.llm_turns += 1
+            self._phase = "llm"
+        elif kind == "tool_start":
+            # Tools requested by the answer being streamed, or a new round once the last one ended
+            if self._phase is None or (self._phase == "tools" and not self._pending):
+                self.llm_turns += 1
+            self._phase = "tools"
+            data = event.get("data") or {}
+            self.tool_calls += 1
+            self._pending[data.get("id")] = (data.get("name") or "tool", time.perf_counter())
+        elif kind in ("tool_end", "tool_error"):
+            pending = self._pending.pop((event.get("data") or {}).get("id"), None)
+            if pending is not None:
+                name, started = pending
+                seconds = time.perf_counter() - started
+                stats = self.tools.setdefault(name, [0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+                if not self.cached:
+                    CHAT_TOOL_SECONDS.observe(seconds, model=self.model, tool=name)
+
+    def summary(self) -> dict:
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        return {
+            "cached": self.cached,
+            "agent_init_ms": ms(self.agent_init),
+            "queue_ms": ms(self.queue_wait),
+            "ttft_ms": ms(self.ttft),
+            "total_ms": ms(self.elapsed()),
+            "llm_turns": self.llm_turns,
+            "tool_calls": self.tool_calls,
+            "tools": {name: {"calls": calls, "ms": ms(seconds)} for name, (calls, seconds) in self.tools.items()},
+            "context": self.context,
+            "tokens": self.tokens,
+        }
+
+    def finish(self, status: str) -> None:
+        labels = {"model": self.model, "provider": self.provider}
+        if self.ttft is not None:
+            CHAT_TTFT_SECONDS.observe(self.ttft, source="cache" if self.cached else "agent", **labels)
+        if self.cached:
+            return
+        CHAT_REQUESTS.inc(status=status, **labels)
+        CHAT_RUN_SECONDS.observe(self.elapsed(), status=status, **labels)
+        if self.queue_wait is not None:
+            CHAT_QUEUE_SECONDS.observe(self.queue_wait, **labels)
+        if status == "completed":
+            CHAT_LLM_TURNS.observe(self.llm_turns, **labels)
+            CHAT_TOOL_CALLS.observe(self.tool_calls, **labels)
+        if self.tokens is not None:
+            CHAT_LLM_TOKENS.inc(self.tokens["input_tokens"], kind="input", **labels)
+            CHAT_LLM_TOKENS.inc(self.tokens["output_tokens"], kind="output", **labels)
+        if self.context is not None and self.context["llm_calls"]:
+            CHAT_CONTEXT_TOKENS_SAVED.observe(self.context["tokens_saved"], **labels)
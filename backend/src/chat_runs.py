@@ -0,0 +1,239 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional
+
+# Outcome counters for agent runs. `cancelled_seconds` is how long cancelled runs
+# had been running when their last client went away; `cancelled_tool_calls`
+# counts tool calls that were still pending when a run was cancelled or timed out.
+RUN_STATS = {
+    "started": 0,
+    "completed": 0,
+    "failed": 0,
+    "cancelled": 0,
+    "timed_out": 0,
+    "cancelled_seconds": 0.0,
+    "cancelled_tool_calls": 0,
+}
+
+
+class ChatRun:
+    """
+    One agent execution, driven by its own task and followed by one or more clients.
+
+    The run is cancelled when its last follower disconnects, immediately or,
+    with `linger`, only if no follower comes back within `linger` seconds (so a
+    client can reconnect and resume). A wall-clock `timeout` bounds the whole
+    run and `tool_timeout` bounds each tool call (measured from its
+    `tool_start` to its `tool_end`/`tool_error` event); when either expires the
+    run is cancelled and ends with a final `error` event.
+
+    Events are numbered from 0 in the order they were produced. With
+    `max_events`, only the latest ones are kept for followers that start late
+    (`first_seq` is the number of the oldest one still buffered).
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[dict],
+        *,
+        timeout: Optional[float] = None,
+        tool_timeout: Optional[float] = None,
+        linger: float = 0.0,
+        max_events: Optional[int] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self._source = source
+        self.timeout = timeout
+        self.tool_timeout = tool_timeout
+        self.linger = linger
+        self.max_events = max_events
+        self.events: list[dict] = []
+        self.first_seq = 0
+        self.finished_at: Optional[float] = None
+        self._linger_timer: Optional[asyncio.TimerHandle] = None
+        self.done = False
+        self.status: Optional[str] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._followers = 0
+        self._expired: Optional[str] = None
+        self._timers: dict[Optional[str], asyncio.TimerHandle] = {}
+        self._callbacks: list[Callable[["ChatRun"], None]] = []
+        self._started_at = 0.0
+
+    def start(self) -> "ChatRun":
+        RUN_STATS["started"] += 1
+        self._started_at = time.monotonic()
+        self._task = asyncio.create_task(self._produce())
+        if self.timeout:
+            self._timers["__run__"] = asyncio.get_running_loop().call_later(
+                self.timeout, self._expire, "Request timed out"
+            )
+        return self
+
+    def add_done_callback(self, fn: Callable[["ChatRun"], None]) -> None:
+        if self.done:
+            fn(self)
+        else:
+            self._callbacks.append(fn)
+
+    @property
+    def followers(self) -> int:
+        return self._followers
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def _expire(self, reason: str) -> None:
+        if self._expired is None and not self.done:
+            self._expired = reason
+            self.cancel()
+
+    def _track_tool(self, event: dict) -> None:
+        if not self.tool_timeout:
+            return
+        data = event.get("data") or {}
+        tool_id = data.get("id")
+        if event["type"] == "tool_start":
+            name = data.get("name") or "tool"
+            self._timers[tool_id] = asyncio.get_running_loop().call_later(
+                self.tool_timeout, self._expire, f"Tool {name} timed out"
+            )
+        elif event["type"] in ("tool_end", "tool_error"):
+            timer = self._timers.pop(tool_id, None)
+            if timer is not None:
+                timer.cancel()
+
+    def _push(self, event: dict) -> None:
+        self.events.append(event)
+        if self.max_events and len(self.events) > self.max_events:
+            # Drop a tenth at a time, so trimming stays cheap
+            drop = len(self.events) - self.max_events + self.max_events // 10
+            del self.events[:drop]
+            self.first_seq += drop
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _produce(self) -> None:
+        failed = False
+        try:
+            async for event in self._source:
+                if event.get("type") in ("tool_start", "tool_end", "tool_error"):
+                    self._track_tool(event)
+                elif event.get("type") == "error":
+                    failed = True
+                self._push(event)
+            self.status = "failed" if failed else "completed"
+        except asyncio.CancelledError:
+            pending_tools = len([k for k in self._timers if k != "__run__"])
+            RUN_STATS["cancelled_tool_calls"] += pending_tools
+            if self._expired is not None:
+                self.status = "timed_out"
+                self._push({"type": "error", "data": self._expired})
+            else:
+                self.status = "cancelled"
+                RUN_STATS["cancelled_seconds"] += time.monotonic() - self._started_at
+        except Exception as e:
+            # Sources report their own errors as events; this only catches what escapes them
+            self.status = "failed"
+            self._push({"type": "error", "data": str(e) or type(e).__name__})
+        finally:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            await self._source.aclose()
+            RUN_STATS[self.status or "failed"] += 1
+            if self._linger_timer is not None:
+                self._linger_timer.cancel()
+            self.finished_at = time.monotonic()
+            self.done = True
+            self._changed.set()
+            for fn in self._callbacks:
+                fn(self)
+
+    async def follow(self, start: int = 0, *, with_seq: bool = False) -> AsyncIterator:
+        """
+        Yield the run's events from number `start` (as `(seq, event)` pairs with `with_seq`).
+
+        The run is cancelled when the last follower leaves (after `linger`).
+        A follower that falls behind the buffer ends with an `error` event.
+        """
+        self._followers += 1
+        if self._linger_timer is not None:
+            self._linger_timer.cancel()
+            self._linger_timer = None
+        try:
+            seq = start
+            while True:
+                if seq < self.first_seq:
+                    yield self._lost(seq, with_seq)
+                    return
+                while seq - self.first_seq < len(self.events):
+                    event = self.events[seq - self.first_seq]
+                    yield (seq, event) if with_seq else event
+                    seq += 1
+                if self.done:
+                    return
+                await self._changed.wait()
+        finally:
+            self._followers -= 1
+            if self._followers == 0 and not self.done:
+                if self.linger > 0:
+                    self._linger_timer = asyncio.get_running_loop().call_later(self.linger, self._abandon)
+                else:
+                    self.cancel()
+
+    def _lost(self, seq: int, with_seq: bool):
+        event = {"type": "error", "data": "Stream fell behind and events were lost; please resend the question"}
+        return (seq, event) if with_seq else event
+
+    def _abandon(self) -> None:
+        self._linger_timer = None
+        if self._followers == 0:
+            self.cancel()
+
+
+class RunRegistry:
+    """
+    Runs that clients can reconnect to, by id.
+
+    A run stays available while it is going and for `ttl` seconds after it
+    ends; beyond `max_runs` the oldest finished runs are dropped first.
+    """
+
+    def __init__(self, *, ttl: float = 120.0, max_runs: int = 1000):
+        self.ttl = ttl
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, ChatRun]" = OrderedDict()
+        self.stats = {"resumed": 0, "expired": 0, "gone": 0}
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def _expired(self, run: ChatRun, now: float) -> bool:
+        return run.finished_at is not None and now - run.finished_at > self.ttl
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for run_id in [r for r, run in self._runs.items() if self._expired(run, now)]:
+            del self._runs[run_id]
+            self.stats["expired"] += 1
+        if len(self._runs) > self.max_runs:
+            for run_id in [r for r, run in self._runs.items() if run.done][: len(self._runs) - self.max_runs]:
+                del self._runs[run_id]
+                self.stats["expired"] += 1
+
+    def add(self, run: ChatRun) -> None:
+        self._runs[run.id] = run
+        self._purge()
+
+    def get(self, run_id: str) -> Optional[ChatRun]:
+        run = self._runs.get(run_id)
+        if run is not None and self._expired(run, time.monotonic()):
+            del self._runs[run_id]
+            self.stats["expired"] += 1
+            return None
+        return run
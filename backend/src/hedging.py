@@ -0,0 +1,288 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+# Events that show a model is actually answering (first token or first tool call)
+PROGRESS_TYPES = ("message", "tool_start")
+
+# hedged: backup runs started; backup_won / primary_won: which lane answered a hedged
+# request; backup_unavailable: hedge delay passed but no backup could take a slot;
+# rerouted: requests sent to another provider because theirs was degraded
+HEDGE_STATS = {
+    "hedged": 0,
+    "backup_won": 0,
+    "primary_won": 0,
+    "backup_unavailable": 0,
+    "rerouted": 0,
+}
+
+_END = object()
+
+
+class _ProviderStats:
+    __slots__ = ("ttft", "ttft_samples", "outcomes", "last_attempt")
+
+    def __init__(self, window: int):
+        self.ttft: Optional[float] = None  # EWMA of the time to first progress, in seconds
+        self.ttft_samples = 0
+        self.outcomes: deque = deque(maxlen=window)  # True = answered, False = failed
+        self.last_attempt = 0.0
+
+
+class ProviderHealth:
+    """
+    Rolling latency and error statistics per LLM provider.
+
+    The time to first progress is tracked as an exponentially weighted moving
+    average, errors over the last `window` runs. A provider is degraded once it
+    fails at least `max_error_rate` of its recent runs, or its average takes
+    `slow_ttft` seconds or more, each judged on `min_samples` observations at
+    least (runs abandoned for a faster backup count as latency). A degraded
+    provider gets one request every `probe_interval` seconds, so it can show
+    it has recovered.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 20,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        slow_ttft: float = 20.0,
+        probe_interval: float = 30.0,
+        alpha: float = 0.3,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.slow_ttft = slow_ttft
+        self.probe_interval = probe_interval
+        self.alpha = alpha
+        self._providers: dict[str, _ProviderStats] = {}
+
+    def _stats(self, provider: str) -> _ProviderStats:
+        stats = self._providers.get(provider)
+        if stats is None:
+            stats = self._providers[provider] = _ProviderStats(self.window)
+        return stats
+
+    def _update_ttft(self, stats: _ProviderStats, seconds: float) -> None:
+        stats.ttft = seconds if stats.ttft is None else stats.ttft + self.alpha * (seconds - stats.ttft)
+        stats.ttft_samples += 1
+
+    def attempt(self, provider: str) -> None:
+        """Note that a run is starting on `provider` (spaces out recovery probes)."""
+        self._stats(provider).last_attempt = time.monotonic()
+
+    def record_progress(self, provider: str, seconds: float) -> None:
+        stats = self._stats(provider)
+        self._update_ttft(stats, seconds)
+        stats.outcomes.append(True)
+
+    def record_slow(self, provider: str, seconds: float) -> None:
+        """A run abandoned after `seconds` without progress (it lost a hedge): a lower bound on its latency."""
+        self._update_ttft(self._stats(provider), seconds)
+
+    def record_error(self, provider: str) -> None:
+        self._stats(provider).outcomes.append(False)
+
+    def error_rate(self, provider: str) -> Optional[float]:
+        stats = self._providers.get(provider)
+        if stats is None or not stats.outcomes:
+            return None
+        return stats.outcomes.count(False) / len(stats.outcomes)
+
+    def unhealthy(self, provider: str) -> bool:
+        """Whether the statistics of `provider` cross a threshold (probes aside)."""
+        stats = self._providers.get(provider)
+        if stats is None:
+            return False
+        if len(stats.outcomes) >= self.min_samples and self.error_rate(provider) >= self.max_error_rate:
+            return True
+        return stats.ttft_samples >= self.min_samples and stats.ttft >= self.slow_ttft
+
+    def degraded(self, provider: str) -> bool:
+        """Whether requests should avoid `provider` right now (False when a recovery probe is due)."""
+        if not self.unhealthy(provider):
+            return False
+        return time.monotonic() - self._providers[provider].last_attempt < self.probe_interval
+
+    def snapshot(self) -> dict:
+        return {
+            provider: {
+                "ttft_ewma_s": None if stats.ttft is None else round(stats.ttft, 3),
+                "error_rate": self.error_rate(provider),
+                "runs": len(stats.outcomes),
+                "degraded": self.unhealthy(provider),
+            }
+            for provider, stats in self._providers.items()
+        }
+
+
+class ProviderRouter:
+    """
+    Picks the model that serves a request, and the backups that may hedge it.
+
+    Backups are the models of `backup_models` (every model of `models` when
+    empty) whose provider differs from the requested one and is not degraded,
+    in configuration order.
+    """
+
+    def __init__(self, models: dict[str, str], health: ProviderHealth, backup_models: Optional[list[str]] = None):
+        self.models = models
+        self.health = health
+        self.backup_models = backup_models or []
+
+    def backups(self, model: str) -> list[str]:
+        provider = self.models.get(model)
+        candidates = [m for m in self.backup_models if m in self.models] or list(self.models)
+        return [
+            m for m in candidates
+            if m != model and self.models[m] != provider and not self.health.degraded(self.models[m])
+        ]
+
+    def route(self, model: str) -> str:
+        """`model`, or its first healthy backup when the provider of `model` is degraded."""
+        provider = self.models.get(model)
+        if provider is None or not self.health.degraded(provider):
+            return model
+        backups = self.backups(model)
+        if not backups:
+            return model
+        HEDGE_STATS["rerouted"] += 1
+        print(f"Provider {provider} is degraded: routing {model} to {backups[0]}")
+        return backups[0]
+
+
+class Lane:
+    """One model's run inside a hedged request; `release` frees its admission slot."""
+
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        events: AsyncIterator[dict],
+        release: Optional[Callable[[], None]] = None,
+    ):
+        self.model = model
+        self.provider = provider
+        self.events = events
+        self.release = release
+        self.started_at = time.monotonic()
+        self.progressed = False
+        self.done = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, queue: asyncio.Queue) -> None:
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self._pump(queue))
+
+    async def _pump(self, queue: asyncio.Queue) -> None:
+        try:
+            async for event in self.events:
+                queue.put_nowait((self, event))
+        except Exception as e:
+            # Event sources report their own errors; this is a last resort
+            queue.put_nowait((self, {"type": "error", "data": str(e)}))
+        finally:
+            queue.put_nowait((self, _END))
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with suppress(BaseException):
+                await self._task
+        with suppress(Exception):
+            await self.events.aclose()
+        if self.release is not None:
+            self.release()
+            self.release = None
+
+
+async def hedged_events(
+    primary: Lane,
+    start_backup: Callable[[], Awaitable[Optional[Lane]]],
+    *,
+    delay: float,
+    health: ProviderHealth,
+) -> AsyncIterator[dict]:
+    """
+    Events of `primary`, or of a backup run if that one starts answering first.
+
+    If `primary` shows no progress (first answer chunk or tool call) within
+    `delay` seconds, `start_backup` is awaited for a second lane. Each lane's
+    events are held back until one of them makes progress; that lane's events
+    are then forwarded and the other lane is cancelled. A lane that ends
+    without progress while another is still running is dropped, so an early
+    provider error does not end the request. Latencies and errors are recorded
+    in `health`.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    lanes = [primary]
+    held: dict[Lane, list[dict]] = {primary: []}
+    health.attempt(primary.provider)
+    primary.start(queue)
+    hedge_at: Optional[float] = loop.time() + delay
+    winner: Optional[Lane] = None
+
+    try:
+        while winner is None:
+            timeout = None if hedge_at is None else max(0.0, hedge_at - loop.time())
+            try:
+                lane, event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                hedge_at = None
+                backup = await start_backup()
+                if backup is None:
+                    HEDGE_STATS["backup_unavailable"] += 1
+                    continue
+                HEDGE_STATS["hedged"] += 1
+                lanes.append(backup)
+                held[backup] = []
+                health.attempt(backup.provider)
+                backup.start(queue)
+                continue
+
+            if event is _END:
+                lane.done = True
+                health.record_error(lane.provider)
+                if any(not other.done for other in lanes):
+                    held.pop(lane, None)
+                    continue
+                winner = lane  # every lane failed: report this one's error
+                break
+            held[lane].append(event)
+            if event.get("type") in PROGRESS_TYPES:
+                lane.progressed = True
+                health.record_progress(lane.provider, time.monotonic() - lane.started_at)
+                winner = lane
+
+        for lane in lanes:
+            if lane is not winner:
+                if not lane.done:
+                    health.record_slow(lane.provider, time.monotonic() - lane.started_at)
+                await lane.close()
+        if len(lanes) > 1:
+            HEDGE_STATS["primary_won" if winner is primary else "backup_won"] += 1
+            if winner is not primary:
+                yield {"type": "route", "data": {"model": winner.model, "provider": winner.provider, "reason": "hedge"}}
+
+        for event in held.pop(winner):
+            yield event
+        if winner.done:
+            return
+        while True:
+            lane, event = await queue.get()
+            if lane is not winner:
+                continue
+            if event is _END:
+                return
+            if event.get("type") == "error":
+                health.record_error(lane.provider)
+            yield event
+    finally:
+        for lane in lanes:
+            await lane.close()
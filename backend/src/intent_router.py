@@ -0,0 +1,145 @@
+import json
+import re
+from typing import Iterable, Optional
+
+from langchain_core.tools import BaseTool
+
+_END = r"[\s!.?]*$"
+
+GREETING_RE = re.compile(r"^\s*(hi|hello|hey|yo|good (morning|afternoon|evening))" + _END, re.IGNORECASE)
+THANKS_RE = re.compile(
+    r"^\s*((ok(ay)?|great|perfect|many),? )?(thanks?( you)?( (so|very) much| a lot)?|thx|ty)" + _END,
+    re.IGNORECASE,
+)
+GOODBYE_RE = re.compile(r"^\s*(bye|goodbye|see you|see ya|cheers)" + _END, re.IGNORECASE)
+HELP_RE = re.compile(
+    r"^\s*(help|\?|what can you do|what do you do|who are you|what are you|how does (this|it) work"
+    r"|what can i ask( you)?|how (do|can) i use (this|you))" + _END,
+    re.IGNORECASE,
+)
+# A message that already is a SPARQL query only needs to be executed
+SPARQL_RE = re.compile(r"^\s*(PREFIX\s.*)?\b(SELECT|ASK|CONSTRUCT|DESCRIBE)\b.*\bWHERE\s*\{", re.IGNORECASE | re.DOTALL)
+
+REPLIES = {
+    "greeting": "Hello! What would you like to ask about DOREMUS?",
+    "thanks": "You're welcome! Ask me anything else about DOREMUS.",
+    "goodbye": "Goodbye! Come back any time with more questions about classical music.",
+    "help": (
+        "I answer questions about classical music from the DOREMUS knowledge graph: works, composers, "
+        "performances, recordings and instrumentation. I look up the entities you mention, build a SPARQL "
+        "query and answer from its results. Try for example \"Find all compositions by Beethoven\" or "
+        "\"Which works for violin and piano did Fauré write?\"."
+    ),
+}
+
+# Local routes answered without an LLM, in matching order
+LOCAL_ROUTES = {
+    "greeting": GREETING_RE,
+    "thanks": THANKS_RE,
+    "goodbye": GOODBYE_RE,
+    "help": HELP_RE,
+}
+
+# Tools only bound when the question matches their pattern (every other tool is always bound)
+DEFAULT_TOOL_ROUTES = {
+    "select_aggregate_variable": (
+        r"\b(how many|count|number of|total|average|mean|sum|most|least|max(imum)?|min(imum)?|per|each|ranking|top)\b"
+    ),
+    # Explicit multi-entity phrasing only: plain "and"/"with"/commas appear in most questions
+    "associate_to_N_entities": (
+        r"\b(both|either|neither|together|jointly|in common|between|among|all of|any of|each of|as well as)\b"
+    ),
+}
+SPARQL_TOOLS = frozenset({"execute_query"})
+
+
+def parse_tool_routes(spec: str) -> dict[str, str]:
+    """Parse TOOL_ROUTES: "tool=regex;tool=regex" (a regex may itself contain "=")."""
+    routes = {}
+    for part in spec.split(";"):
+        name, sep, pattern = part.partition("=")
+        if sep and name.strip() and pattern.strip():
+            routes[name.strip()] = pattern.strip()
+    return routes
+
+
+def _schema_chars(tool: BaseTool) -> int:
+    return len(tool.name) + len(tool.description or "") + len(json.dumps(tool.args, default=str))
+
+
+class Route:
+    """Where a message goes: a local `reply`, or the agent bound to `tools` (None = every tool)."""
+
+    __slots__ = ("name", "reply", "tools")
+
+    def __init__(self, name: str, reply: Optional[str] = None, tools: Optional[frozenset] = None):
+        self.name = name
+        self.reply = reply
+        self.tools = tools
+
+
+class IntentRouter:
+    """
+    Cheap local routing in front of the agent.
+
+    Messages matching one of `local_routes` (greetings, thanks, help...) get a
+    canned reply without an LLM call. With `subset_tools`, other messages are
+    sent to an agent bound to only the tools they may need: a tool listed in
+    `tool_routes` is bound only when the message matches its pattern, and a
+    message that already is a SPARQL query gets `execute_query` alone. Fewer
+    tool schemas mean a shorter prompt on every LLM turn. `stats` counts how
+    often each route fires.
+    """
+
+    def __init__(
+        self,
+        local_routes: Iterable[str] = LOCAL_ROUTES,
+        *,
+        subset_tools: bool = False,
+        tool_routes: Optional[dict[str, str]] = None,
+    ):
+        self.local_routes = [(name, LOCAL_ROUTES[name]) for name in local_routes if name in LOCAL_ROUTES]
+        self.subset_tools = subset_tools
+        self.tool_routes = {
+            name: re.compile(pattern, re.IGNORECASE)
+            for name, pattern in (DEFAULT_TOOL_ROUTES if tool_routes is None else tool_routes).items()
+        }
+        self.stats: dict[str, int] = {}
+        # Tool schemas left out of the agent's prompt, summed over routed requests
+        self.tool_stats = {"subset": 0, "full": 0, "tools_dropped": 0, "schema_chars_saved": 0}
+
+    def _count(self, name: str) -> None:
+        self.stats[name] = self.stats.get(name, 0) + 1
+
+    def route(self, message: str) -> Route:
+        message = message or ""
+        for name, pattern in self.local_routes:
+            if pattern.match(message):
+                self._count(name)
+                return Route(name, reply=REPLIES[name])
+        if self.subset_tools and SPARQL_RE.match(message):
+            self._count("sparql")
+            return Route("sparql", tools=SPARQL_TOOLS)
+        self._count("agent")
+        return Route("agent")
+
+    def tool_subset(self, route: Route, message: str, tools: list[BaseTool]) -> Optional[frozenset]:
+        """Names of the tools to bind for `message`, or None to bind all of them."""
+        if not self.subset_tools:
+            return None
+        if route.tools is not None:
+            keep = [t for t in tools if t.name in route.tools]
+        else:
+            keep = [
+                t for t in tools
+                if t.name not in self.tool_routes or self.tool_routes[t.name].search(message or "")
+            ]
+        if not keep or len(keep) == len(tools):
+            self.tool_stats["full"] += 1
+            return None
+        names = frozenset(t.name for t in keep)
+        dropped = [t for t in tools if t.name not in names]
+        self.tool_stats["subset"] += 1
+        self.tool_stats["tools_dropped"] += len(dropped)
+        self.tool_stats["schema_chars_saved"] += sum(_schema_chars(t) for t in dropped)
+        return names
@@ -2,48 +2,169 @@ import asyncio
 import json
 import os
 import re
+import time
 import traceback
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, HTMLResponse
+from contextlib import suppress
+from typing import AsyncIterator
+from fastapi import FastAPI, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field, ValidationError
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
 
 # IMPORT YOUR EXISTING AGENT
-from agent.mcp_testing_agent import initialize_agent 
+from agent.mcp_testing_agent import (
+    initialize_agent, client, context_compactor, env_flag, evaluation_models, get_tool_catalog,
+    on_tool_catalog_change, prefetcher, result_store, session_store,
+)
+from agent.context_compaction import track_run
+from agent.token_usage import track_tokens
+from agent.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, counter_lines, gauge_lines
+from admission import AdmissionController, QueueFull
+from batch_eval import BATCH_STATS, ResultsFile, batch_jobs, completed_jobs, load_questions, run_batch
+from chat_cache import ChatResponseCache, chat_cache_key
+from chat_metrics import AGENT_INIT_SECONDS, RunTiming
+from chat_runs import ChatRun, RunRegistry, RUN_STATS
+from hedging import HEDGE_STATS, Lane, ProviderHealth, ProviderRouter, hedged_events
+from intent_router import LOCAL_ROUTES, IntentRouter, parse_tool_routes
+from sse import coalesced_frames, token_frames
+from static_files import StaticSite
 
 app = FastAPI()
 
-_GREETING_RE = re.compile(
-    r"^\s*(hi|hello|hey|yo|good (morning|afternoon|evening))[\s!.?]*$",
-    re.IGNORECASE,
+# Local pre-routing: INTENT_ROUTES answer trivial and meta messages without an LLM; with
+# TOOL_SUBSETTING, questions go to an agent bound to the tools they may need (TOOL_ROUTES)
+_INTENTS = IntentRouter(
+    [r.strip() for r in os.getenv("INTENT_ROUTES", ",".join(LOCAL_ROUTES)).split(",") if r.strip()],
+    subset_tools=env_flag("TOOL_SUBSETTING"),
+    tool_routes=parse_tool_routes(os.environ["TOOL_ROUTES"]) if "TOOL_ROUTES" in os.environ else None,
 )
 
-# Cache agents per model/provider
-_AGENT_CACHE: dict[str, object] = {}
-_AGENT_LOCK = asyncio.Lock()
+# Cache agents per model/provider and tool subset (one init lock per agent, so they initialize independently)
+_AGENT_CACHE: dict[object, object] = {}
+_AGENT_LOCKS: dict[object, asyncio.Lock] = {}
+
+# Comma-separated models whose agents are built in the background at startup
+AGENT_PREWARM_MODELS = [m.strip() for m in os.getenv("AGENT_PREWARM_MODELS", "").split(",") if m.strip()]
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
 
 DEBUG_ERRORS = True
 
-async def get_agent(model: str):
+# Raw LangChain events/callbacks handled by the chat event source
+EVENT_SOURCE_STATS = {"processed": 0}
+
+# Wall-clock limit for a whole agent run and for a single tool call (0 = no limit)
+CHAT_RUN_TIMEOUT = float(os.getenv("CHAT_RUN_TIMEOUT", "300"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "120"))
+
+# Admission control: concurrent runs per provider (PROVIDER_CONCURRENCY_<PROVIDER> overrides
+# the default), plus a bounded wait queue; requests beyond it get a 429
+PROVIDER_CONCURRENCY = int(os.getenv("PROVIDER_CONCURRENCY", "4"))
+_ADMISSION = AdmissionController(
+    {
+        provider: int(os.getenv(f"PROVIDER_CONCURRENCY_{provider.upper()}", PROVIDER_CONCURRENCY))
+        for provider in set(evaluation_models.values())
+    },
+    default_limit=PROVIDER_CONCURRENCY,
+    max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "16")),
+    max_queue_time=float(os.getenv("ADMISSION_MAX_QUEUE_TIME", "30")),
+)
+
+# Provider routing: "fixed" runs the requested model; "hedged" starts a backup model on another
+# provider when the first one shows no progress within HEDGE_DELAY_MS, and routes requests away
+# from providers whose recent error rate or time to first progress crosses the thresholds
+ROUTING_MODE = os.getenv("ROUTING_MODE", "fixed").strip().lower()
+HEDGE_DELAY_MS = float(os.getenv("HEDGE_DELAY_MS", "4000"))
+_HEALTH = ProviderHealth(
+    window=int(os.getenv("PROVIDER_HEALTH_WINDOW", "20")),
+    min_samples=int(os.getenv("PROVIDER_HEALTH_MIN_SAMPLES", "5")),
+    max_error_rate=float(os.getenv("PROVIDER_MAX_ERROR_RATE", "0.5")),
+    slow_ttft=float(os.getenv("PROVIDER_SLOW_TTFT", "20")),
+    probe_interval=float(os.getenv("PROVIDER_PROBE_INTERVAL", "30")),
+)
+_ROUTER = ProviderRouter(
+    evaluation_models,
+    _HEALTH,
+    [m.strip() for m in os.getenv("HEDGE_MODELS", "").split(",") if m.strip()],
+)
+
+# SSE framing: "coalesce" batches consecutive message chunks, "token" sends one frame per chunk
+SSE_FRAMING = os.getenv("SSE_FRAMING", "coalesce").strip().lower()
+SSE_COALESCE_WINDOW_MS = float(os.getenv("SSE_COALESCE_WINDOW_MS", "25"))
+SSE_COALESCE_MAX_BYTES = int(os.getenv("SSE_COALESCE_MAX_BYTES", "1024"))
+# Send a `timing` event (latency breakdown of the request) at the end of each stream
+SSE_TIMING_EVENT = env_flag("SSE_TIMING_EVENT")
+
+# Resumable streams: /chat frames carry SSE ids and a client that lost its connection
+# resumes with GET /chat/runs/{run_id} and Last-Event-ID while the run keeps going.
+# Off by default: a disconnected run then holds its provider slot for SSE_RESUME_GRACE
+SSE_RESUME_ENABLED = env_flag("SSE_RESUME_ENABLED")
+SSE_RESUME_GRACE = float(os.getenv("SSE_RESUME_GRACE", "30"))
+SSE_REPLAY_MAX_EVENTS = int(os.getenv("SSE_REPLAY_MAX_EVENTS", "5000"))
+_RUNS = RunRegistry(
+    ttl=float(os.getenv("SSE_RESUME_TTL", "120")),
+    max_runs=int(os.getenv("SSE_RESUME_MAX_RUNS", "1000")),
+) if SSE_RESUME_ENABLED else None
+
+# Final-answer cache for /chat (CHAT_CACHE_TTL=0 disables it)
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "900"))
+_CHAT_CACHE = ChatResponseCache(
+    ttl=CHAT_CACHE_TTL,
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("CHAT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+) if env_flag("CHAT_CACHE_ENABLED", "true") and CHAT_CACHE_TTL > 0 else None
+
+@app.on_event("shutdown")
+async def close_mcp_sessions():
+    await client.aclose()
+
+async def get_agent(model: str, tool_names: frozenset | None = None, conversation: bool = False):
+    key = model if tool_names is None and not conversation else (model, tool_names, conversation)
     # Fast path (no lock)
-    cached = _AGENT_CACHE.get(model)
+    cached = _AGENT_CACHE.get(key)
     if cached is not None:
         return cached
 
     # Slow path (init once)
-    async with _AGENT_LOCK:
-        cached = _AGENT_CACHE.get(model)
+    async with _AGENT_LOCKS.setdefault(key, asyncio.Lock()):
+        cached = _AGENT_CACHE.get(key)
         if cached is not None:
             return cached
-        agent = await initialize_agent(model)
-        _AGENT_CACHE[model] = agent
+        started = time.perf_counter()
+        agent = await initialize_agent(model, tool_names, session_store if conversation else None)
+        AGENT_INIT_SECONDS.observe(time.perf_counter() - started, model=model, provider=evaluation_models.get(model, ""))
+        _AGENT_CACHE[key] = agent
         return agent
 
-def _sse(data: dict) -> str:
-    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+# Agents are compiled with a fixed tool list: rebuild them when the MCP catalog changes
+on_tool_catalog_change(lambda tools: _AGENT_CACHE.clear())
+
+async def _prewarm_agents(models: list[str]):
+    results = await asyncio.gather(*(get_agent(m) for m in models), return_exceptions=True)
+    for model, result in zip(models, results):
+        if isinstance(result, Exception):
+            print(f"Agent prewarm failed for {model}: {result}")
+
+@app.on_event("startup")
+async def prewarm_agents():
+    if AGENT_PREWARM_MODELS:
+        task = asyncio.create_task(_prewarm_agents(AGENT_PREWARM_MODELS))
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+async def _evict_idle_sessions():
+    interval = min(60.0, max(1.0, session_store.idle_ttl / 4))
+    while True:
+        await asyncio.sleep(interval)
+        session_store.evict_idle()
+
+@app.on_event("startup")
+async def start_session_eviction():
+    if session_store is not None:
+        task = asyncio.create_task(_evict_idle_sessions())
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
 
 def _tool_content(output_data) -> str:
     """Return the raw tool output as a plain string (prefer ToolMessage.content)."""
@@ -141,22 +262,30 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
     model: str
+    # Messages with the same conversation_id share the agent's memory (previous turns, resolved entities)
+    conversation_id: str | None = Field(None, min_length=1, max_length=128)
 
 # 1. Where the built frontend is expected inside the backend image
 static_dir = os.path.join(os.path.dirname(__file__), "static")
-index_path = os.path.join(static_dir, "index.html")
 
-# 2. Mount the React build folder (CSS/JS assets), if present
-if os.path.isdir(static_dir):
-    assets_dir = os.path.join(static_dir, "assets")
-    if os.path.isdir(assets_dir):
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+# 2. Index the React build once; files are served from memory (see static_files.py)
+_STATIC = StaticSite(static_dir) if os.path.isdir(static_dir) else None
+STATIC_PRECOMPRESS = env_flag("STATIC_PRECOMPRESS", "true")
+
+@app.on_event("startup")
+async def precompress_static():
+    # Off the event loop: until it finishes, files without a precompressed variant go out uncompressed
+    if _STATIC is not None and STATIC_PRECOMPRESS:
+        task = asyncio.create_task(asyncio.to_thread(_STATIC.precompress))
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     # If the React build exists, serve it; otherwise show a simple backend page
-    if os.path.isfile(index_path):
-        return FileResponse(index_path)
+    index = _STATIC.get("index.html") if _STATIC is not None else None
+    if index is not None:
+        return _STATIC.response(index, request.headers)
     return "<h1>Welcome to the MCP Backend</h1>"
 
 def _event_brief(ev: dict) -> str:
@@ -177,137 +306,820 @@ def _extract_error_text(ev: dict) -> str:
         err = data.get("output")
     return str(err) if err is not None else "Unknown error"
 
+def _tool_start_event(tool_id, name, args) -> dict:
+    return {
+        "type": "tool_start",
+        "data": {
+            "id": tool_id,
+            "name": name or "tool",
+            "args": args,
+        },
+    }
+
+def _tool_error_event(tool_id, name, error) -> dict:
+    return {
+        "type": "tool_error",
+        "data": {
+            "id": tool_id,
+            "name": name or "tool",
+            "error": str(error)[:220],
+        },
+    }
+
+def _tool_end_events(tool_id, name, output_data) -> list[dict]:
+    """Trace events for a finished tool call: a summarized tool_end, plus sparql_update when a query was built."""
+    if output_data is None:
+        return [_tool_error_event(tool_id, "tool", "Tool Error")]
+    if name in ["__start__"]:
+        return []
+
+    raw = _tool_content(output_data)
+    events = [{
+        "type": "tool_end",
+        "data": {
+            "id": tool_id,
+            "name": name or "tool",
+            "output": _summarize_tool_result(raw, tool_name=name)
+        },
+    }]
+
+    # Large result kept server-side: tell the client where to page through it
+    if raw and '"result_id"' in raw:
+        obj = _normalize_tool_output(raw)
+        if isinstance(obj, dict) and obj.get("result_id"):
+            events.append({
+                "type": "result_ready",
+                "data": {
+                    "id": obj["result_id"],
+                    "tool_id": tool_id,
+                    "name": name or "tool",
+                    "row_count": obj.get("row_count"),
+                    "columns": obj.get("columns"),
+                },
+            })
+
+    # Keep SPARQL update based on raw JSON
+    if raw and "generated_query" in raw:
+        try:
+            json_content = json.loads(raw)
+            query = json_content.get("generated_query")
+            if query:
+                events.append({"type": "sparql_update", "data": query})
+        except Exception:
+            pass
+    return events
+
+def _run_error_event(e: Exception) -> dict:
+    # Log server-side, but DON'T leak LangChain error into the chat stream
+    error_msg = str(e)
+    if DEBUG_ERRORS:
+        print("Error during chat processing:", error_msg)
+        print(traceback.format_exc(limit=8))
+
+    # Option A: send a generic error event (frontend can ignore or show a toast)
+    return {"type": "error", "data": error_msg[:30]}
+
+def _run_config(thread_id: str | None, **config) -> dict:
+    if thread_id is not None:
+        config["configurable"] = {"thread_id": thread_id}
+    return config
+
+async def _agent_events(agent, message: str, thread_id: str | None = None):
+    """Run the agent on `message` and yield the chat events forwarded to the client."""
+    try:
+        # Stream events from the graph
+        async for event in agent.astream_events(
+            {"messages": [HumanMessage(content=message)]}, _run_config(thread_id), version="v1"
+        ):
+            EVENT_SOURCE_STATS["processed"] += 1
+
+            event_type = event["event"]
+            event_name = event.get("name") or event.get("metadata", {}).get("name")
+
+            # Use run_id to correlate tool_start/tool_end/tool_error
+            run_id = event.get("run_id")
+            tool_id = str(run_id) if run_id is not None else None
+
+            # DETECT TOOL START (Name + Args)
+            if event_type == "on_tool_start":
+                # Filter out internal LangChain tools if necessary
+                if event_name not in ["__start__", "_Exception"]:
+                    yield _tool_start_event(tool_id, event_name, event.get("data", {}).get("input"))
+
+            # DETECT TOOL CALL (The SPARQL generation)
+            if event_type == "on_tool_end":
+                for ev in _tool_end_events(tool_id, event_name, event.get("data", {}).get("output")):
+                    yield ev
+
+            # DETECT ERRORS
+            elif event_type == "on_tool_error" or event_type == "on_chain_error":
+                if DEBUG_ERRORS:
+                    print("[LC ERROR EVENT]", event)
+                yield _tool_error_event(tool_id, event_name, event.get("data", {}).get("error"))
+
+            # DETECT FINAL TEXT ANSWER
+            elif event_type == "on_chat_model_stream":
+                chunk = event.get("data", {}).get("chunk")
+                if chunk and hasattr(chunk, "content") and chunk.content:
+                    yield {
+                        "type": "message",
+                        "data": chunk.content
+                    }
+    except Exception as e:
+        yield _run_error_event(e)
+
+class _ToolEventHandler(AsyncCallbackHandler):
+    """
+    Turns tool callbacks into chat events for `_streamed_agent_events`.
+
+    Chain, retriever and LLM callbacks are skipped entirely (LLM tokens come
+    from the graph's "messages" stream), so most of a run's callbacks never
+    reach this handler.
+    """
+
+    ignore_chain = True
+    ignore_llm = True
+    ignore_chat_model = True
+    ignore_retriever = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self, push):
+        self._push = push
+        self._names: dict[str, str] = {}
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, inputs=None, **kwargs):
+        EVENT_SOURCE_STATS["processed"] += 1
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if name in ["__start__", "_Exception"]:
+            return
+        self._names[str(run_id)] = name
+        self._push(_tool_start_event(str(run_id), name, inputs if inputs is not None else input_str))
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        EVENT_SOURCE_STATS["processed"] += 1
+        name = self._names.pop(str(run_id), None) or kwargs.get("name")
+        for ev in _tool_end_events(str(run_id), name, output):
+            self._push(ev)
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        EVENT_SOURCE_STATS["processed"] += 1
+        if DEBUG_ERRORS:
+            print("[LC ERROR EVENT]", repr(error))
+        # astream_events v1 reports a failed tool as a tool end without output: keep that event
+        for ev in _tool_end_events(str(run_id), self._names.pop(str(run_id), None), None):
+            self._push(ev)
+
+async def _streamed_agent_events(agent, message: str, thread_id: str | None = None):
+    """
+    Same events as `_agent_events`, from the graph's "messages" stream (LLM
+    token deltas) and a callback handler that only listens to tool calls.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    handler = _ToolEventHandler(queue.put_nowait)
+
+    async def pump():
+        try:
+            async for chunk, _metadata in agent.astream(
+                {"messages": [HumanMessage(content=message)]},
+                config=_run_config(thread_id, callbacks=[handler]),
+                stream_mode="messages",
+            ):
+                EVENT_SOURCE_STATS["processed"] += 1
+                if isinstance(chunk, AIMessage) and chunk.content:
+                    queue.put_nowait({"type": "message", "data": chunk.content})
+        finally:
+            queue.put_nowait(done)
+
+    task = asyncio.create_task(pump())
+    try:
+        while (event := await queue.get()) is not done:
+            yield event
+        task.result()
+    except Exception as e:
+        yield _run_error_event(e)
+    finally:
+        if not task.done():
+            task.cancel()
+            with suppress(BaseException):
+                await task
+
+async def _backup_lane(model: str, message: str, tool_names: frozenset | None):
+    """A run of the first backup of `model` that can get a provider slot right away, if any."""
+    for backup in _ROUTER.backups(model):
+        provider = evaluation_models[backup]
+        ticket = _ADMISSION.try_admit(provider)
+        if ticket is None:
+            continue
+        try:
+            agent = await get_agent(backup, tool_names)
+        except Exception as e:
+            ticket.release()
+            _HEALTH.record_error(provider)
+            print(f"Hedge backup {backup} unavailable: {e}")
+            continue
+        except BaseException:
+            ticket.release()
+            raise
+        return Lane(backup, provider, _EVENT_SOURCE(agent, message), release=ticket.release)
+    return None
+
+def _routed_events(model: str, agent, message: str, tool_names: frozenset | None, thread_id: str | None):
+    # A conversation's checkpoints take a single run: no hedging there
+    if ROUTING_MODE != "hedged" or thread_id is not None:
+        return _EVENT_SOURCE(agent, message, thread_id)
+    return hedged_events(
+        Lane(model, evaluation_models[model], _EVENT_SOURCE(agent, message)),
+        lambda: _backup_lane(model, message, tool_names),
+        delay=HEDGE_DELAY_MS / 1000.0,
+        health=_HEALTH,
+    )
+
+async def _admitted_events(
+    ticket,
+    agent,
+    message: str,
+    timing: RunTiming,
+    model: str,
+    tool_names: frozenset | None = None,
+    thread_id: str | None = None,
+):
+    """Wait in the provider queue (forwarding queue positions), then run the agent."""
+    try:
+        queued_at = time.perf_counter()
+        async for event in ticket.wait():
+            yield event
+        timing.queue_wait = time.perf_counter() - queued_at
+        if not ticket.granted:
+            return
+        if context_compactor is not None:
+            timing.context = track_run()
+        timing.tokens = track_tokens()
+        if model != timing.model:
+            yield {"type": "route", "data": {"model": model, "provider": evaluation_models[model], "reason": "degraded"}}
+        async for event in _routed_events(model, agent, message, tool_names, thread_id):
+            timing.observe(event)
+            yield event
+        if SSE_TIMING_EVENT:
+            yield {"type": "timing", "data": timing.summary()}
+    finally:
+        ticket.release()
+
+async def _cached_events(events, timing: RunTiming):
+    """A cached (or in-flight) answer, with this request's own timing."""
+    timing.cached = True
+    try:
+        async for event in events:
+            if event.get("type") == "timing":
+                continue
+            timing.observe(event)
+            yield event
+        if SSE_TIMING_EVENT:
+            yield {"type": "timing", "data": timing.summary()}
+    finally:
+        timing.finish("completed")
+
+# Event source for agent runs: "messages" (LangGraph messages stream + tool callbacks)
+# or "astream_events" (the full astream_events v1 firehose)
+CHAT_EVENT_SOURCE = os.getenv("CHAT_EVENT_SOURCE", "messages").strip().lower()
+_EVENT_SOURCE = _agent_events if CHAT_EVENT_SOURCE == "astream_events" else _streamed_agent_events
+
+def _sse_stream(events, run_id: str | None = None):
+    if SSE_FRAMING == "token":
+        return token_frames(events, run_id=run_id)
+    return coalesced_frames(
+        events, window=SSE_COALESCE_WINDOW_MS / 1000.0, max_bytes=SSE_COALESCE_MAX_BYTES, run_id=run_id
+    )
+
+def _run_stream(run: ChatRun, start: int = 0) -> StreamingResponse:
+    """Stream `run` from event `start`, with SSE ids when runs are resumable."""
+    if _RUNS is None:
+        return StreamingResponse(_sse_stream(run.follow(start)), media_type="text/event-stream")
+    return StreamingResponse(
+        _sse_stream(run.follow(start, with_seq=True), run.id),
+        media_type="text/event-stream",
+        headers={"X-Run-Id": run.id},
+    )
+
+class _ChatRejected(Exception):
+    """A chat request answered with an error status instead of events."""
+
+    def __init__(self, status_code: int, message: str, retry_after: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+    def response(self) -> JSONResponse:
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else None
+        return JSONResponse({"type": "error", "data": self.message}, status_code=self.status_code, headers=headers)
+
+async def _local_reply(text: str):
+    yield {"type": "message", "data": text}
+
+async def _open_chat(req: ChatRequest) -> tuple[ChatRun | None, AsyncIterator[dict] | None]:
+    """
+    Start answering `req` (shared by /chat and /ws).
+
+    Returns an agent run to follow, or None and the events to stream for
+    local replies and cached answers.
+
+    Raises:
+        _ChatRejected: If the conversation is busy or the provider saturated.
+    """
+    route = _INTENTS.route(req.message)
+    if route.reply is not None:
+        return None, _local_reply(route.reply)
+
+    # Hedged routing sends the request to a healthy provider when the requested one is degraded
+    model = _ROUTER.route(req.model) if ROUTING_MODE == "hedged" else req.model
+    timing = RunTiming(req.model, evaluation_models.get(req.model, ""))
+    tool_names = _INTENTS.tool_subset(route, req.message, await get_tool_catalog()) if _INTENTS.subset_tools else None
+    thread_id = req.conversation_id if session_store is not None else None
+    agent = await get_agent(model, tool_names, conversation=thread_id is not None)
+    timing.agent_init = timing.elapsed()
+
+    # One turn at a time per conversation: both would continue from the same checkpoint
+    if thread_id is not None and not session_store.begin(thread_id):
+        raise _ChatRejected(409, "The previous message of this conversation is still being answered")
+
+    # Replay a cached answer, or follow an identical run that is still in progress
+    # (not within a conversation: the answer depends on the earlier turns)
+    cache_key = chat_cache_key(req.message, req.model)
+    if _CHAT_CACHE is not None and thread_id is None:
+        events = _CHAT_CACHE.attach(cache_key)
+        if events is not None:
+            return None, _cached_events(events, timing)
+
+    try:
+        ticket = _ADMISSION.admit(evaluation_models[model])
+    except QueueFull as e:
+        if thread_id is not None:
+            session_store.rollback(thread_id)
+        raise _ChatRejected(429, "Server busy, please retry", retry_after=e.retry_after) from None
+
+    # The run is driven by its own task and cancelled when the client disconnects
+    # (and, with resumable streams, does not come back within the grace period)
+    run = ChatRun(
+        _admitted_events(ticket, agent, req.message, timing, model, tool_names, thread_id),
+        timeout=CHAT_RUN_TIMEOUT or None,
+        tool_timeout=TOOL_CALL_TIMEOUT or None,
+        linger=SSE_RESUME_GRACE if _RUNS is not None else 0.0,
+        max_events=SSE_REPLAY_MAX_EVENTS or None,
+    )
+    run.add_done_callback(lambda r: timing.finish(r.status))
+    if thread_id is not None:
+        # Only a completed turn becomes part of the conversation
+        run.add_done_callback(
+            lambda r: session_store.commit(thread_id) if r.status == "completed" else session_store.rollback(thread_id)
+        )
+    if _CHAT_CACHE is not None and thread_id is None:
+        run = _CHAT_CACHE.record(cache_key, run)
+    else:
+        run.start()
+    if _RUNS is not None:
+        _RUNS.add(run)
+    return run, None
+
 @app.post("/chat")
 async def chat_endpoint(req: ChatRequest):
-    if _GREETING_RE.match(req.message or ""):
-        async def event_generator():
-            payload = json.dumps({"type": "message", "data": "Hello! What would you like to ask about DOREMUS?"})
-            yield f"data: {payload}\n\n"
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
-    
-    agent = await get_agent(req.model)
+    try:
+        run, events = await _open_chat(req)
+    except _ChatRejected as e:
+        return e.response()
+    if run is not None:
+        return _run_stream(run)
+    return StreamingResponse(_sse_stream(events), media_type="text/event-stream")
 
-    async def event_generator():
+def _resume_seq(last_event_id: str, run_id: str) -> int | None:
+    """The event number in a Last-Event-ID ("<run_id>:<seq>" or "<seq>"), or None if malformed."""
+    prefix, _, seq = last_event_id.strip().rpartition(":")
+    if prefix and prefix != run_id:
+        return None
+    try:
+        return int(seq)
+    except ValueError:
+        return None
+
+@app.get("/chat/runs/{run_id}")
+async def resume_chat_run(
+    run_id: str,
+    last_event_id: str | None = None,
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """Resume a /chat stream after the event given as Last-Event-ID (header or query), or from the start."""
+    run = _RUNS.get(run_id) if _RUNS is not None else None
+    if run is None:
+        if _RUNS is not None:
+            _RUNS.stats["gone"] += 1
+        return JSONResponse({"detail": "Unknown or expired run"}, status_code=404)
+    last = last_event_id_header or last_event_id
+    start = 0
+    if last:
+        seq = _resume_seq(last, run_id)
+        if seq is None:
+            return JSONResponse({"detail": "Invalid Last-Event-ID"}, status_code=400)
+        start = seq + 1
+    if start < run.first_seq:
+        _RUNS.stats["gone"] += 1
+        return JSONResponse({"detail": "Events after Last-Event-ID are no longer buffered"}, status_code=410)
+    _RUNS.stats["resumed"] += 1
+    return _run_stream(run, start)
+
+# WebSocket transport: concurrent runs per socket, and frames queued per socket before the
+# runs wait for the client to read (a slow reader never makes the server buffer more)
+WS_MAX_RUNS = int(os.getenv("WS_MAX_RUNS", "8"))
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", "64"))
+# connections: sockets accepted; runs / cancelled / rejected: run requests received over them
+WS_STATS = {"connections": 0, "open": 0, "runs": 0, "cancelled": 0, "rejected": 0}
+
+def _ws_frame(run_key: str | None, event: dict) -> str:
+    return json.dumps({"id": run_key, **event}, ensure_ascii=False, default=str)
+
+@app.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """
+    Chat over one socket: several runs at once, each tagged with the client's id.
+
+    The client sends `{"type": "chat", "id", "message", "model", "conversation_id"}`
+    and `{"type": "cancel", "id"}`; every event of a run comes back as
+    `{"id", "type", "data"}` (the /chat event types) and each run ends with a
+    `done` event giving its status.
+    """
+    await websocket.accept()
+    WS_STATS["connections"] += 1
+    WS_STATS["open"] += 1
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=max(1, WS_SEND_QUEUE))
+    runs: dict[str, asyncio.Task] = {}
+    agent_runs: dict[str, ChatRun] = {}
+
+    async def send_frames():
+        while True:
+            await websocket.send_text(await outbox.get())
+
+    async def follow(run_key: str, req: ChatRequest):
+        run, events = None, None
         try:
-            # Stream events from the graph
-            async for event in agent.astream_events({"messages": [HumanMessage(content=req.message)]}, version="v1"):
-
-                event_type = event["event"]
-                event_name = event.get("name") or event.get("metadata", {}).get("name")
-
-                # Use run_id to correlate tool_start/tool_end/tool_error
-                run_id = event.get("run_id")
-                tool_id = str(run_id) if run_id is not None else None
-
-                # DETECT TOOL START (Name + Args)
-                if event_type == "on_tool_start":
-                    # Filter out internal LangChain tools if necessary
-                    if event_name not in ["__start__", "_Exception"]:
-                        tool_input = event.get("data", {}).get("input")
-                        yield _sse(
-                        {
-                            "type": "tool_start",
-                            "data": {
-                                "id": tool_id,
-                                "name": event_name or "tool",
-                                "args": tool_input,
-                            },
-                        }
-                    )
-            
-                # DETECT TOOL CALL (The SPARQL generation)
-                if event_type == "on_tool_end":
-                    output_data = event.get("data", {}).get("output")
-
-                    if output_data is None:
-                        yield _sse(
-                            {
-                                "type": "tool_error",
-                                "data": {
-                                    "id": tool_id,
-                                    "name": "tool",
-                                    "error": "Tool Error",
-                                },
-                            }
-                        )
-                        continue
-                        
-                    raw = _tool_content(output_data)
-
-                    if event_name not in ["__start__"]:
-
-                        # Send summarized output to the trace
-                        yield _sse(
-                            {
-                                "type": "tool_end",
-                                "data": {
-                                    "id": tool_id,
-                                    "name": event_name or "tool",
-                                    "output": _summarize_tool_result(raw, tool_name=event_name)
-                                },
-                            }
-                        )
-
-                        # Keep SPARQL update based on raw JSON
-                        if raw and "generated_query" in raw:
-                            try:
-                                json_content = json.loads(raw)
-                                query = json_content.get("generated_query")
-                                if query:
-                                    yield _sse({"type": "sparql_update", "data": query})
-                            except Exception:
-                                pass
-                
-                # DETECT ERRORS
-                elif event_type == "on_tool_error" or event_type == "on_chain_error":
-                    if DEBUG_ERRORS:
-                        print("[LC ERROR EVENT]", event)
-                    err = event.get("data", {}).get("error")
-                    err_text = str(err)
-                    yield _sse(
-                        {
-                            "type": "tool_error",
-                            "data": {
-                                "id": tool_id,
-                                "name": event_name or "tool",
-                                "error": err_text[:220],
-                            },
-                        }
-                    )
-                
-                # DETECT FINAL TEXT ANSWER
-                elif event_type == "on_chat_model_stream":
-                    chunk = event.get("data", {}).get("chunk")
-                    if chunk and hasattr(chunk, "content") and chunk.content:
-                        yield _sse({
-                            "type": "message", 
-                            "data": chunk.content
-                        })
+            try:
+                run, events = await _open_chat(req)
+            except _ChatRejected as e:
+                WS_STATS["rejected"] += 1
+                await outbox.put(_ws_frame(run_key, {"type": "error", "data": e.message}))
+                done = {"status": "rejected", "code": e.status_code}
+                if e.retry_after is not None:
+                    done["retry_after"] = e.retry_after
+                await outbox.put(_ws_frame(run_key, {"type": "done", "data": done}))
+                return
+            if run is not None:
+                agent_runs[run_key] = run
+                events = run.follow()
+                await outbox.put(_ws_frame(run_key, {"type": "run", "data": {"run_id": run.id}}))
+            # Waits while the outbox is full: the run keeps going, this follower reads its buffer later
+            async for event in events:
+                await outbox.put(_ws_frame(run_key, event))
+            status = run.status if run is not None else "completed"
+            await outbox.put(_ws_frame(run_key, {"type": "done", "data": {"status": status}}))
         except Exception as e:
-            # Log server-side, but DON'T leak LangChain error into the chat stream
-            error_msg = str(e)
-            if DEBUG_ERRORS:
-                print("Error during chat processing:", error_msg)
-                print(traceback.format_exc(limit=8))
-
-            # Option A: send a generic error event (frontend can ignore or show a toast)
-            yield _sse({"type": "error", "data": error_msg[:30]})
+            await outbox.put(_ws_frame(run_key, _run_error_event(e)))
+            await outbox.put(_ws_frame(run_key, {"type": "done", "data": {"status": "failed"}}))
+        finally:
+            if events is not None:
+                with suppress(Exception):
+                    await events.aclose()
+            runs.pop(run_key, None)
+            agent_runs.pop(run_key, None)
+
+    async def cancel(run_key: str, stop_run: bool) -> None:
+        """Stop following a run; with `stop_run`, also stop the agent unless someone else follows it."""
+        task = runs.pop(run_key, None)
+        run = agent_runs.get(run_key)
+        if task is None:
             return
-    
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+        task.cancel()
+        with suppress(BaseException):
+            await task
+        if stop_run and run is not None and not run.done and run.followers == 0:
+            run.cancel()
 
-# 1. Mount the React build folder (CSS/JS assets)
-static_dir = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(static_dir):
-    app.mount("/assets", StaticFiles(directory=os.path.join(static_dir, "assets")), name="assets")
+    sender = asyncio.create_task(send_frames())
+    try:
+        while True:
+            try:
+                msg = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await outbox.put(_ws_frame(None, {"type": "error", "data": "Invalid JSON"}))
+                continue
+            if not isinstance(msg, dict):
+                msg = {}
+            kind = msg.get("type")
+            run_key = str(msg["id"]) if msg.get("id") is not None else None
+
+            if kind == "chat":
+                run_key = run_key or f"run-{WS_STATS['runs']}"
+                WS_STATS["runs"] += 1
+                if run_key in runs:
+                    error = "A run with this id is already in progress"
+                elif len(runs) >= WS_MAX_RUNS:
+                    error = f"Too many runs in progress on this connection (max {WS_MAX_RUNS})"
+                else:
+                    try:
+                        req = ChatRequest(**{k: msg.get(k) for k in ("message", "model", "conversation_id")})
+                    except ValidationError as e:
+                        error = f"Invalid chat message: {e.errors()[0]['loc'][0]} {e.errors()[0]['msg']}"
+                    else:
+                        runs[run_key] = asyncio.create_task(follow(run_key, req))
+                        continue
+                WS_STATS["rejected"] += 1
+                await outbox.put(_ws_frame(run_key, {"type": "error", "data": error}))
+                await outbox.put(_ws_frame(run_key, {"type": "done", "data": {"status": "rejected"}}))
+            elif kind == "cancel":
+                if run_key not in runs:
+                    continue  # already finished
+                await cancel(run_key, stop_run=True)
+                WS_STATS["cancelled"] += 1
+                await outbox.put(_ws_frame(run_key, {"type": "done", "data": {"status": "cancelled"}}))
+            else:
+                await outbox.put(_ws_frame(run_key, {"type": "error", "data": f"Unknown message type: {kind}"}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WS_STATS["open"] -= 1
+        # Runs left behind keep going for SSE_RESUME_GRACE, resumable by their run_id
+        for run_key in list(runs):
+            await cancel(run_key, stop_run=False)
+        sender.cancel()
+        with suppress(BaseException):
+            await sender
 
-# 2. Catch-all route: Serve index.html for any other path (React Router support)
+# Batch evaluation (/batch and batch_eval.py): jobs run per provider at most BATCH_PROVIDER_CONCURRENCY
+# at a time, within the provider's admission limit; BATCH_RESULTS_DIR keeps named batches resumable.
+# Off by default: a single request can spend up to BATCH_MAX_JOBS LLM runs
+BATCH_ENABLED = env_flag("BATCH_ENABLED", "false")
+BATCH_PROVIDER_CONCURRENCY = int(os.getenv("BATCH_PROVIDER_CONCURRENCY", "2"))
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "1000"))
+BATCH_RESULTS_DIR = os.getenv("BATCH_RESULTS_DIR", "")
+_ACTIVE_BATCHES: set[str] = set()
+
+async def _batch_ticket(provider: str):
+    """A provider slot for a batch job: unlike /chat, a busy provider is waited for, not refused."""
+    while True:
+        try:
+            ticket = _ADMISSION.admit(provider)
+        except QueueFull as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+        try:
+            async for _ in ticket.wait():
+                pass
+        except BaseException:
+            ticket.release()
+            raise
+        if ticket.granted:
+            return ticket
+
+async def _batch_events(agent, question: str, timing: RunTiming):
+    if context_compactor is not None:
+        timing.context = track_run()
+    timing.tokens = track_tokens()
+    async for event in _EVENT_SOURCE(agent, question):
+        timing.observe(event)
+        yield event
+
+async def batch_job_events(question: str, model: str):
+    """
+    Events of one batch job: `model` answering `question` (never rerouted or hedged, and
+    not served from the answer cache), then a `timing` event with its latency and tokens.
+    """
+    provider = evaluation_models[model]
+    timing = RunTiming(model, provider)
+    agent = await get_agent(model)
+    timing.agent_init = timing.elapsed()
+    ticket = await _batch_ticket(provider)
+    timing.queue_wait = timing.elapsed() - timing.agent_init
+    run = ChatRun(
+        _batch_events(agent, question, timing),
+        timeout=CHAT_RUN_TIMEOUT or None,
+        tool_timeout=TOOL_CALL_TIMEOUT or None,
+    )
+    # The job owns the provider slot until its run has been followed to the end (or abandoned)
+    try:
+        async for event in run.start().follow():
+            yield event
+    finally:
+        ticket.release()
+    yield {"type": "timing", "data": timing.summary()}
+
+def _batch_path(batch_id: str) -> str:
+    return os.path.join(BATCH_RESULTS_DIR, f"{batch_id}.jsonl")
+
+@app.post("/batch")
+async def batch_endpoint(
+    request: Request,
+    models: str = Query(..., description="Comma-separated evaluation_models keys"),
+    batch_id: str | None = Query(None, pattern=r"^[\w.-]{1,64}$"),
+    concurrency: int = Query(BATCH_PROVIDER_CONCURRENCY, ge=1),
+):
+    """Run the JSONL questions of the request body on `models`; results stream back as JSONL as jobs finish."""
+    if not BATCH_ENABLED:
+        return JSONResponse({"detail": "Not Found"}, status_code=404)
+    try:
+        questions = load_questions((await request.body()).decode("utf-8").splitlines())
+        model_list = [m.strip() for m in models.split(",") if m.strip()]
+        done = set()
+        if batch_id is not None:
+            if not BATCH_RESULTS_DIR:
+                raise ValueError("Named batches need BATCH_RESULTS_DIR on the server")
+            done = completed_jobs(_batch_path(batch_id))
+        jobs, skipped = batch_jobs(questions, model_list, evaluation_models, done)
+    except (UnicodeDecodeError, ValueError) as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    if len(jobs) > BATCH_MAX_JOBS:
+        return JSONResponse({"detail": f"Too many jobs ({len(jobs)} > {BATCH_MAX_JOBS})"}, status_code=413)
+    if batch_id in _ACTIVE_BATCHES:
+        return JSONResponse({"detail": "This batch is already running"}, status_code=409)
+
+    limits = {provider: min(concurrency, limit) for provider, limit in _ADMISSION.limits.items()}
+
+    async def results():
+        if batch_id is not None:
+            if batch_id in _ACTIVE_BATCHES:
+                yield json.dumps({"status": "error", "error": "This batch is already running"}) + "\n"
+                return
+            _ACTIVE_BATCHES.add(batch_id)
+            os.makedirs(BATCH_RESULTS_DIR, exist_ok=True)
+        out = ResultsFile(_batch_path(batch_id)) if batch_id is not None else None
+        try:
+            async for record in run_batch(
+                questions,
+                model_list,
+                batch_job_events,
+                providers=evaluation_models,
+                concurrency=min(concurrency, PROVIDER_CONCURRENCY),
+                limits=limits,
+                done=done,
+            ):
+                if out is not None:
+                    out.write(record)
+                yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        finally:
+            if out is not None:
+                out.close()
+            _ACTIVE_BATCHES.discard(batch_id)
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Jobs": str(len(jobs)), "X-Batch-Skipped": str(skipped)},
+    )
+
+@app.get("/batch/{batch_id}")
+async def get_batch_results(batch_id: str):
+    """Every result recorded so far for a named batch (JSONL; a job retried after a failure appears twice)."""
+    if not BATCH_ENABLED:
+        return JSONResponse({"detail": "Not Found"}, status_code=404)
+    path = _batch_path(batch_id) if BATCH_RESULTS_DIR and re.fullmatch(r"[\w.-]{1,64}", batch_id) else None
+    if path is None or not os.path.exists(path):
+        return JSONResponse({"detail": "Unknown batch"}, status_code=404)
+    return FileResponse(path, media_type="application/x-ndjson")
+
+RESULTS_MAX_PAGE_SIZE = int(os.getenv("RESULTS_MAX_PAGE_SIZE", "1000"))
+
+async def _result_page(entry, offset: int, limit: int, chunk_bytes: int = 64 * 1024):
+    """Stream one page of a stored result as a JSON document, a batch of rows at a time."""
+    rows = entry.rows[offset:offset + limit]
+    next_offset = offset + len(rows) if offset + len(rows) < len(entry.rows) else None
+    head = {
+        "id": entry.id,
+        "tool": entry.tool_name,
+        "columns": entry.columns,
+        "row_count": len(entry.rows),
+        "offset": offset,
+        "next_offset": next_offset,
+    }
+    parts = [json.dumps(head, ensure_ascii=False)[:-1] + ', "rows": [']
+    size = 0
+    for i, row in enumerate(rows):
+        part = ("," if i else "") + json.dumps(row, ensure_ascii=False, default=str)
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_bytes:
+            yield "".join(parts)
+            parts, size = [], 0
+    parts.append("]}")
+    yield "".join(parts)
+
+@app.get("/results/{result_id}")
+async def get_result(
+    result_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+):
+    entry = result_store.get(result_id) if result_store is not None else None
+    if entry is None:
+        return JSONResponse({"type": "error", "data": "Result not found or expired"}, status_code=404)
+    return StreamingResponse(
+        _result_page(entry, offset, min(limit, RESULTS_MAX_PAGE_SIZE)),
+        media_type="application/json",
+    )
+
+def _chat_cache_metrics():
+    if _CHAT_CACHE is None:
+        return []
+    return counter_lines(
+        "chat_cache_lookups_total",
+        "Answer cache lookups on /chat (coalesced = followed an identical run in progress)",
+        {
+            (("result", "hit"),): _CHAT_CACHE.stats["hits"],
+            (("result", "miss"),): _CHAT_CACHE.stats["misses"],
+            (("result", "coalesced"),): _CHAT_CACHE.stats["coalesced"],
+        },
+    )
+
+REGISTRY.add_collector(_chat_cache_metrics)
+
+def _routing_metrics():
+    if ROUTING_MODE != "hedged":
+        return []
+    health = _HEALTH.snapshot()
+    return [
+        *counter_lines(
+            "chat_hedge_events_total",
+            "Hedged routing decisions (hedged = backup run started, rerouted = sent away from a degraded provider)",
+            {(("event", name),): value for name, value in HEDGE_STATS.items()},
+        ),
+        *gauge_lines(
+            "provider_ttft_ewma_seconds",
+            "Moving average of the time to first answer chunk or tool call, per provider",
+            {(("provider", p),): h["ttft_ewma_s"] for p, h in health.items() if h["ttft_ewma_s"] is not None},
+        ),
+        *gauge_lines(
+            "provider_error_rate",
+            "Share of failed runs among the provider's recent runs",
+            {(("provider", p),): h["error_rate"] for p, h in health.items() if h["error_rate"] is not None},
+        ),
+        *gauge_lines(
+            "provider_degraded",
+            "1 while requests are routed away from the provider",
+            {(("provider", p),): int(h["degraded"]) for p, h in health.items()},
+        ),
+    ]
+
+REGISTRY.add_collector(_routing_metrics)
+
+def _intent_metrics():
+    return counter_lines(
+        "chat_intent_routes_total",
+        "Messages by local route (agent = sent to the LLM agent, sparql = raw query run with execute_query alone)",
+        {(("route", route),): count for route, count in _INTENTS.stats.items()},
+    )
+
+REGISTRY.add_collector(_intent_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/stats")
+async def stats():
+    return {
+        "runs": RUN_STATS,
+        "event_source": {"name": CHAT_EVENT_SOURCE, **EVENT_SOURCE_STATS},
+        "chat_cache": _CHAT_CACHE.stats if _CHAT_CACHE is not None else None,
+        "websocket": {**WS_STATS, "max_runs": WS_MAX_RUNS},
+        "batch": {**BATCH_STATS, "active": len(_ACTIVE_BATCHES)},
+        "resumable_runs": {**_RUNS.stats, "runs": len(_RUNS)} if _RUNS is not None else None,
+        "prefetch": prefetcher.stats if prefetcher is not None else None,
+        "context_compaction": context_compactor.stats if context_compactor is not None else None,
+        "sessions": (
+            {**session_store.stats, "sessions": len(session_store), "bytes": session_store.bytes}
+            if session_store is not None else None
+        ),
+        "result_store": (
+            {**result_store.stats, "entries": len(result_store), "bytes": result_store.bytes}
+            if result_store is not None else None
+        ),
+        "admission": {**_ADMISSION.stats, "providers": _ADMISSION.snapshot()},
+        "intents": {"routes": _INTENTS.stats, "tools": _INTENTS.tool_stats},
+        "routing": (
+            {"mode": ROUTING_MODE, **HEDGE_STATS, "providers": _HEALTH.snapshot()}
+            if ROUTING_MODE == "hedged" else {"mode": ROUTING_MODE}
+        ),
+    }
+
+# Catch-all route: serve a file of the build, or index.html for any other path (React Router support)
 @app.get("/{full_path:path}")
-async def serve_react_app(full_path: str):
+async def serve_react_app(full_path: str, request: Request):
+    if _STATIC is None:
+        return JSONResponse({"detail": "Not Found"}, status_code=404)
+
     # If the specific file exists (like favicon.ico), serve it
-    file_path = os.path.join(static_dir, full_path)
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
-    
-    # Otherwise, return the main React app
-    return FileResponse(os.path.join(static_dir, "index.html"))
\ No newline at end of file
+    static_file = _STATIC.get(full_path)
+    if static_file is None:
+        # A missing bundle file must not turn into index.html
+        if full_path.startswith("assets/"):
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+        static_file = _STATIC.get("index.html")
+        if static_file is None:
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+    return _STATIC.response(static_file, request.headers)
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from collections import deque
+from contextlib import suppress
+from typing import AsyncIterator, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoder for SSE frames
+    orjson = None
+
+
+def sse_event(data: dict, event_id: Optional[str] = None) -> str:
+    """Encode one event as an SSE `data:` frame (orjson when installed), with an `id:` line if given."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    if orjson is not None:
+        return prefix + "data: " + orjson.dumps(data, default=str).decode("utf-8") + "\n\n"
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _numbered(events: AsyncIterator, run_id: Optional[str]):
+    """(event id, event) pairs: `events` yields (seq, event) pairs when `run_id` is given."""
+    if run_id is None:
+        return ((None, event) async for event in events)
+    return ((f"{run_id}:{seq}", event) async for seq, event in events)
+
+
+async def token_frames(events: AsyncIterator, *, run_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    One frame per event (the original framing).
+
+    With `run_id`, `events` yields `(seq, event)` pairs and each frame gets the
+    SSE id `<run_id>:<seq>`, which a client sends back as Last-Event-ID to resume.
+    """
+    async for event_id, event in _numbered(events, run_id):
+        yield sse_event(event, event_id)
+
+
+async def coalesced_frames(
+    events: AsyncIterator,
+    *,
+    window: float = 0.025,
+    max_bytes: int = 1024,
+    run_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Merge consecutive `message` chunks into one frame.
+
+    Buffered text is flushed when it reaches `max_bytes`, when `window` seconds
+    have passed since its first chunk, or as soon as any other event arrives;
+    every other event is written immediately. With `run_id`, frames carry SSE
+    ids as in `token_frames`; a merged frame has the id of its last chunk.
+    """
+    loop = asyncio.get_running_loop()
+    queue: deque[tuple[Optional[str], dict]] = deque()
+    ready = asyncio.Event()
+
+    buffering = False  # consumer holds text and is sleeping until the window closes
+    queued_bytes = 0
+
+    # A single pump task reads the source, so waiting with a timeout never cancels it.
+    # While the consumer is buffering, more text only wakes it once it fills a frame.
+    async def pump():
+        nonlocal queued_bytes
+        try:
+            async for event_id, event in _numbered(events, run_id):
+                queue.append((event_id, event))
+                if buffering and event.get("type") == "message" and isinstance(event.get("data"), str):
+                    queued_bytes += len(event["data"])
+                    if size + queued_bytes < max_bytes:
+                        continue
+                ready.set()
+        finally:
+            ready.set()
+
+    task = asyncio.create_task(pump())
+    parts: list[str] = []
+    size = 0
+    flush_at = 0.0
+    last_id: Optional[str] = None
+
+    def flush() -> str:
+        nonlocal parts, size
+        frame = sse_event({"type": "message", "data": "".join(parts)}, last_id)
+        parts, size = [], 0
+        return frame
+
+    try:
+        while True:
+            if not queue and not task.done():
+                ready.clear()
+                if parts:
+                    buffering, queued_bytes = True, 0
+                    try:
+                        async with asyncio.timeout_at(flush_at):
+                            await ready.wait()
+                    except TimeoutError:
+                        pass
+                    finally:
+                        buffering = False
+                else:
+                    await ready.wait()
+
+            while queue:
+                event_id, event = queue.popleft()
+                if event.get("type") == "message" and isinstance(event.get("data"), str):
+                    if not parts:
+                        flush_at = loop.time() + window
+                    parts.append(event["data"])
+                    last_id = event_id
+                    size += len(event["data"])
+                    if size >= max_bytes:
+                        yield flush()
+                    continue
+                if parts:
+                    yield flush()
+                yield sse_event(event, event_id)
+
+            if parts and loop.time() >= flush_at:
+                yield flush()
+            if task.done() and not queue:
+                if parts:
+                    yield flush()
+                task.result()  # re-raise a failure of the source
+                return
+    finally:
+        if not task.done():
+            task.cancel()
+            with suppress(BaseException):
+                await task
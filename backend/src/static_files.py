@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Mapping, Optional
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # optional: brotli variants then only come from precompressed .br files
+    brotli = None
+
+# Vite emits content-hashed names such as assets/index-BxQ3f9aZ.js
+_HASHED_NAME_RE = re.compile(r"[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+_ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _etag(data: bytes, suffix: str = "") -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + suffix + '"'
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class StaticFile:
+    __slots__ = ("content_type", "cache_control", "variants")
+
+    def __init__(self, content_type: str, cache_control: str, variants: dict[str, tuple[bytes, str]]):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = variants  # encoding ("identity", "gzip", "br") -> (body, etag)
+
+
+class StaticSite:
+    """
+    In-memory copy of the built frontend.
+
+    The directory is indexed once at startup, so requests never touch the
+    filesystem. Every file is served with a strong ETag (304 on a matching
+    If-None-Match), hashed asset names are marked immutable, and compressible
+    files are sent as brotli or gzip depending on Accept-Encoding. Compressed
+    variants come from `<file>.br`/`<file>.gz` next to the file when the build
+    produced them, or are made by `precompress()`.
+    """
+
+    def __init__(self, root: str, *, max_file_bytes: int = 8 * 1024 * 1024):
+        self.root = root
+        self.files: dict[str, StaticFile] = {}
+        paths = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                paths[os.path.relpath(path, root).replace(os.sep, "/")] = path
+        for rel, path in paths.items():
+            # foo.js.gz / foo.js.br are variants of foo.js, not files of their own
+            base, ext = os.path.splitext(rel)
+            if ext in (".br", ".gz") and base in paths:
+                continue
+            if os.path.getsize(path) <= max_file_bytes:
+                self._add(rel, path)
+        for rel, static_file in self.files.items():
+            self._add_precompressed(rel, static_file)
+
+    def _add(self, rel: str, path: str) -> None:
+        with open(path, "rb") as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        hashed = rel.startswith("assets/") and bool(_HASHED_NAME_RE.search(rel))
+        self.files[rel] = StaticFile(
+            content_type,
+            IMMUTABLE_CACHE_CONTROL if hashed else REVALIDATE_CACHE_CONTROL,
+            {"identity": (data, _etag(data))},
+        )
+
+    def _add_precompressed(self, rel: str, static_file: StaticFile) -> None:
+        for encoding, suffix in _ENCODING_SUFFIXES.items():
+            path = os.path.join(self.root, rel + suffix)
+            if encoding not in static_file.variants and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+                static_file.variants[encoding] = (data, _etag(static_file.variants["identity"][0], "-" + encoding))
+
+    def precompress(self, *, min_bytes: int = 1024) -> None:
+        """Build the missing gzip (and brotli, when available) variants of compressible files."""
+        for static_file in list(self.files.values()):
+            data = static_file.variants["identity"][0]
+            if len(data) < min_bytes or not static_file.content_type.startswith(_COMPRESSIBLE_TYPES):
+                continue
+            etag_base = static_file.variants["identity"][1][1:-1]
+            if "gzip" not in static_file.variants:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    static_file.variants["gzip"] = (compressed, f'"{etag_base}-gzip"')
+            if brotli is not None and "br" not in static_file.variants:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    static_file.variants["br"] = (compressed, f'"{etag_base}-br"')
+
+    def get(self, rel: str) -> Optional[StaticFile]:
+        return self.files.get(rel)
+
+    def response(self, static_file: StaticFile, headers: Mapping[str, str]) -> Response:
+        """Response for `static_file`, honouring Accept-Encoding and If-None-Match."""
+        encoding = "identity"
+        if len(static_file.variants) > 1:
+            accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+            encoding = next((e for e in ("br", "gzip") if e in accepted and e in static_file.variants), "identity")
+        body, etag = static_file.variants[encoding]
+
+        response_headers = {"ETag": etag, "Cache-Control": static_file.cache_control}
+        if len(static_file.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, media_type=static_file.content_type, headers=response_headers)
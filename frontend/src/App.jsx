@@ -74,7 +74,14 @@ const SparqlFormatter = ({ query }) => {
 };
 
 // --- COMPONENT: SETTINGS MODAL (No Changes) ---
-const SettingsModal = ({ isOpen, onClose, model, setModel }) => {
+const SettingsModal = ({
+  isOpen,
+  onClose,
+  model,
+  setModel,
+  rememberConversation,
+  setRememberConversation,
+}) => {
   if (!isOpen) return null;
   return (
     <div className="fixed inset-0 bg-black/50 backdrop-blur-sm z-50 flex items-center justify-center p-4">
@@ -109,6 +116,21 @@ const SettingsModal = ({ isOpen, onClose, model, setModel }) => {
               <option value="ministral-3:14b">mistral - ministral-3:14b</option>
             </select>
           </div>
+          <div>
+            <label className="flex items-center gap-2 text-sm font-semibold text-slate-700">
+              <input
+                type="checkbox"
+                className="h-4 w-4 accent-blue-600"
+                checked={rememberConversation}
+                onChange={(e) => setRememberConversation(e.target.checked)}
+              />
+              Remember conversation
+            </label>
+            <p className="mt-1 text-xs text-slate-500">
+              Follow-up questions see the earlier turns. Answers are then never
+              served from the answer cache and slow models are not hedged.
+            </p>
+          </div>
         </div>
         <div className="p-4 bg-slate-50 border-t flex justify-end">
           <button
@@ -196,11 +218,41 @@ const ToolCallCard = ({ tool }) => {
             {String(tool.output).length > 1200 ? "\n…" : ""}
           </>
         )}
+
+        {tool.result && (
+          <div className="mt-2">
+            <a
+              href={`/results/${tool.result.id}?limit=100`}
+              target="_blank"
+              rel="noreferrer"
+              className="text-blue-400 hover:underline"
+            >
+              full result: {tool.result.row_count} rows
+            </a>
+          </div>
+        )}
       </div>
     </div>
   );
 };
 
+// One id per page load: the backend keeps the conversation's memory under it
+const newConversationId = () =>
+  globalThis.crypto?.randomUUID?.() ??
+  `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
+// A dropped /chat stream is resumed from the last event received, a few times at most
+const RESUME_ATTEMPTS = 3;
+const resumeStream = async (runId, lastEventId, attempt, error) => {
+  if (!runId || attempt > RESUME_ATTEMPTS) throw error;
+  await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+  const response = await fetch(`/chat/runs/${runId}`, {
+    headers: lastEventId ? { "Last-Event-ID": lastEventId } : {},
+  });
+  if (!response.ok) throw error;
+  return response.body.getReader();
+};
+
 // --- MAIN APP ---
 function App() {
   const [input, setInput] = useState("");
@@ -212,7 +264,9 @@ function App() {
   const [isSettingsOpen, setIsSettingsOpen] = useState(false);
   const [isTraceOpen, setIsTraceOpen] = useState(true);
   const [isSparqlCopied, setIsSparqlCopied] = useState(false);
+  const [rememberConversation, setRememberConversation] = useState(false);
   const copyResetTimeoutRef = useRef(null);
+  const conversationIdRef = useRef(newConversationId());
 
   const scrollAnchorRef = useRef(null);
 
@@ -248,26 +302,66 @@ function App() {
         body: JSON.stringify({
           message: currentInput,
           model: selectedModel,
+          // Without one, the answer can come from the cache or a hedged backup model
+          conversation_id: rememberConversation
+            ? conversationIdRef.current
+            : undefined,
           history: messages.map((m) => ({ role: m.role, content: m.content })),
         }),
       });
 
-      const reader = response.body.getReader();
-      const decoder = new TextDecoder();
+      // 429: the backend is at capacity for this model's provider
+      if (!response.ok) {
+        const retryAfter = response.headers.get("Retry-After");
+        setToolHistory((prev) => [
+          ...prev,
+          {
+            id: `${Date.now()}-backend-error`,
+            name: "backend_error",
+            args: null,
+            status: "error",
+            output: null,
+            error: retryAfter
+              ? `Server busy, retry in ${retryAfter}s`
+              : `Request failed (${response.status})`,
+          },
+        ]);
+        return;
+      }
+
+      const runId = response.headers.get("X-Run-Id");
+      let reader = response.body.getReader();
+      let decoder = new TextDecoder();
+      let lastEventId = null;
+      let attempts = 0;
 
       setMessages((prev) => [...prev, { role: "assistant", content: "" }]);
       let buffer = "";
 
       while (true) {
-        const { done, value } = await reader.read();
+        let chunk;
+        try {
+          chunk = await reader.read();
+        } catch (error) {
+          // Connection lost mid-answer: the run goes on, pick it up after the last complete frame
+          reader = await resumeStream(runId, lastEventId, ++attempts, error);
+          decoder = new TextDecoder();
+          buffer = "";
+          continue;
+        }
+        const { done, value } = chunk;
         if (done) break;
 
         buffer += decoder.decode(value, { stream: true });
         const lines = buffer.split("\n\n");
         buffer = lines.pop();
 
-        for (const line of lines) {
-          const trimmed = line.trim();
+        for (const frame of lines) {
+          let trimmed = "";
+          for (const line of frame.split("\n")) {
+            if (line.startsWith("id: ")) lastEventId = line.slice(4).trim();
+            else if (line.startsWith("data: ")) trimmed = line.trim();
+          }
           if (trimmed.startsWith("data: ")) {
             try {
               const parsed = JSON.parse(trimmed.replace("data: ", ""));
@@ -318,6 +412,15 @@ function App() {
                   };
                   return next;
                 });
+              } else if (parsed.type === "result_ready") {
+                // Large result kept on the server: link it from its tool call
+                setToolHistory((prev) =>
+                  prev.map((t) =>
+                    t.id === parsed.data?.tool_id
+                      ? { ...t, result: parsed.data }
+                      : t,
+                  ),
+                );
               } else if (parsed.type === "tool_error") {
                 setToolHistory((prev) => {
                   const id = parsed.data?.id;
@@ -559,6 +662,8 @@ function App() {
         onClose={() => setIsSettingsOpen(false)}
         model={selectedModel}
         setModel={setSelectedModel}
+        rememberConversation={rememberConversation}
+        setRememberConversation={setRememberConversation}
       />
     </div>
   );
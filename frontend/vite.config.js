@@ -10,6 +10,15 @@ export default defineConfig({
         changeOrigin: true,
         secure: false,
       },
+      "/ws": {
+        target: "ws://127.0.0.1:8001",
+        ws: true,
+      },
+      "/results": {
+        target: "http://127.0.0.1:8001",
+        changeOrigin: true,
+        secure: false,
+      },
     },
   },
 });